@@ -0,0 +1,86 @@
+"""Add item owner and user lookup indexes
+
+The indexes are built with CREATE INDEX CONCURRENTLY, which does not block
+writes but can't run inside a transaction, so this revision runs outside of
+one. An existing valid index of the same definition is kept. Databases
+created from the models before these indexes existed may hold a different
+definition, and a failed concurrent build leaves an invalid index behind:
+those are replaced by building the new index under a temporary name first,
+so a unique column is never left without its index, and swapping it in.
+
+Revision ID: 40201c2bf4b9
+Revises: b26497eff0ad
+Create Date: 2026-10-18 03:11:34.679711
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = '40201c2bf4b9'
+down_revision = 'b26497eff0ad'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    # Listing, counting and deleting the items of one owner
+    dict(index_name='ix_item_owner_id_id', table_name='item', columns=['owner_id', 'id']),
+    # Optional login columns, mostly NULL, index only the rows that are set
+    dict(index_name='ix_user_phone', table_name='user', columns=['phone'], unique=True,
+         postgresql_where=sa.text('phone IS NOT NULL')),
+    dict(index_name='ix_user_wechat_unionid', table_name='user', columns=['wechat_unionid'],
+         postgresql_where=sa.text('wechat_unionid IS NOT NULL')),
+    # Full index, it is the ON CONFLICT target of the WeChat login upsert
+    dict(index_name='ix_user_wechat_openid', table_name='user', columns=['wechat_openid'], unique=True),
+]
+
+
+EXISTING_INDEX = sa.text("""
+    SELECT i.indisvalid, i.indisunique, pg_get_expr(i.indpred, i.indrelid),
+           array(SELECT a.attname
+                   FROM unnest(i.indkey) WITH ORDINALITY AS k(attnum, n)
+                   JOIN pg_attribute a
+                     ON a.attrelid = i.indrelid AND a.attnum = k.attnum
+                  ORDER BY k.n)
+      FROM pg_index i
+      JOIN pg_class c ON c.oid = i.indexrelid
+     WHERE c.relname = :name AND c.relnamespace = current_schema()::regnamespace
+""")
+
+
+def is_current(index):
+    row = op.get_bind().execute(EXISTING_INDEX, {'name': index['index_name']}).first()
+    if row is None:
+        return False
+    valid, unique, predicate, columns = row
+    where = index.get('postgresql_where')
+    return (valid and unique == index.get('unique', False)
+            and predicate == (f'({where.text})' if where is not None else None)
+            and list(columns) == index['columns'])
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        for index in INDEXES:
+            if is_current(index):
+                continue
+            name, table_name = index['index_name'], index['table_name']
+            temporary = f'{name}_new'
+            # Left behind by a failed run
+            op.drop_index(temporary, table_name=table_name,
+                          postgresql_concurrently=True, if_exists=True)
+            op.create_index(**{**index, 'index_name': temporary},
+                            postgresql_concurrently=True)
+            op.drop_index(name, table_name=table_name,
+                          postgresql_concurrently=True, if_exists=True)
+            op.execute(f'ALTER INDEX {temporary} RENAME TO {name}')
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for index in INDEXES:
+            op.drop_index(index['index_name'], table_name=index['table_name'],
+                          postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,37 @@
+"""Add user deleted_at
+
+Marks users whose deletion was requested, so the maintenance task can find
+deletions that the background task never finished. The column is nullable
+without a default, adding it does not rewrite the table. The partial index is
+built concurrently, outside of a transaction.
+
+Revision ID: 5d2c8e1f7a93
+Revises: 40201c2bf4b9
+Create Date: 2026-10-18 09:42:17.305128
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = '5d2c8e1f7a93'
+down_revision = '40201c2bf4b9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('user', sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=True))
+    with op.get_context().autocommit_block():
+        op.create_index('ix_user_deleted_at', 'user', ['deleted_at'],
+                        postgresql_where=sa.text('deleted_at IS NOT NULL'),
+                        postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_user_deleted_at', table_name='user',
+                      postgresql_concurrently=True, if_exists=True)
+    op.drop_column('user', 'deleted_at')
@@ -0,0 +1,47 @@
+"""Add phone and WeChat login columns to user
+
+Revision ID: b26497eff0ad
+Revises: 1a31ce608336
+Create Date: 2026-10-18 03:11:33.496558
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = 'b26497eff0ad'
+down_revision = '1a31ce608336'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Columns of the phone and WeChat login, their lookup indexes are built
+    # concurrently by the next revision
+    op.add_column('user', sa.Column('phone', sqlmodel.sql.sqltypes.AutoString(length=20), nullable=True))
+    op.add_column('user', sa.Column('nickname', sqlmodel.sql.sqltypes.AutoString(length=100), nullable=True))
+    op.add_column('user', sa.Column('avatar', sqlmodel.sql.sqltypes.AutoString(length=500), nullable=True))
+    op.add_column('user', sa.Column('wechat_openid', sqlmodel.sql.sqltypes.AutoString(length=100), nullable=True))
+    op.add_column('user', sa.Column('wechat_unionid', sqlmodel.sql.sqltypes.AutoString(length=100), nullable=True))
+    # The default only fills in existing rows, new rows are set by the model
+    op.add_column('user', sa.Column('is_phone_verified', sa.Boolean(), nullable=False, server_default=sa.false()))
+    op.alter_column('user', 'is_phone_verified', server_default=None)
+
+    # Phone and WeChat users have no email
+    op.alter_column('user', 'email',
+               existing_type=sa.String(length=255),
+               nullable=True)
+
+
+def downgrade():
+    op.alter_column('user', 'email',
+               existing_type=sa.String(length=255),
+               nullable=False)
+    op.drop_column('user', 'is_phone_verified')
+    op.drop_column('user', 'wechat_unionid')
+    op.drop_column('user', 'wechat_openid')
+    op.drop_column('user', 'avatar')
+    op.drop_column('user', 'nickname')
+    op.drop_column('user', 'phone')
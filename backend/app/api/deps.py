@@ -1,16 +1,18 @@
-from collections.abc import Generator
+import ipaddress
+import math
+from collections.abc import AsyncGenerator, Generator
 from typing import Annotated
 
-import jwt
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from jwt.exceptions import InvalidTokenError
 from pydantic import ValidationError
 from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.core import security
+from app.core import cache, rate_limit, security
 from app.core.config import settings
-from app.core.db import engine
+from app.core.db import async_engine, engine
 from app.models import TokenPayload, User
 
 reusable_oauth2 = OAuth2PasswordBearer(
@@ -19,26 +21,40 @@ reusable_oauth2 = OAuth2PasswordBearer(
 
 
 def get_db() -> Generator[Session, None, None]:
-    with Session(engine) as session:
+    # Writes set every column on the client, reloading after commit would
+    # only repeat what is already in memory.
+    with Session(engine, expire_on_commit=False) as session:
+        yield session
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    # Objects are serialized after the handler returns, keep them loaded
+    # instead of triggering lazy IO outside of the session context.
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
         yield session
 
 
 SessionDep = Annotated[Session, Depends(get_db)]
+AsyncSessionDep = Annotated[AsyncSession, Depends(get_async_db)]
 TokenDep = Annotated[str, Depends(reusable_oauth2)]
 
 
-def get_current_user(session: SessionDep, token: TokenDep) -> User:
+async def get_current_user(session: AsyncSessionDep, token: TokenDep) -> User:
     try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[security.ALGORITHM]
-        )
+        payload = security.decode_access_token(token)
         token_data = TokenPayload(**payload)
     except (InvalidTokenError, ValidationError):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Could not validate credentials",
         )
-    user = session.get(User, token_data.sub)
+    user = None
+    if token_data.sub and (cached := await cache.get_user(token_data.sub)):
+        user = cache.attach_user(session, cached)
+    if user is None:
+        user = await session.get(User, token_data.sub)
+        if user:
+            await cache.set_user(user)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     if not user.is_active:
@@ -55,3 +71,94 @@ def get_current_active_superuser(current_user: CurrentUser) -> User:
             status_code=403, detail="The user doesn't have enough privileges"
         )
     return current_user
+
+
+def _is_trusted_proxy(host: str) -> bool:
+    try:
+        address = ipaddress.ip_address(host.strip())
+    except ValueError:
+        return False
+    return any(address in network for network in settings.RATE_LIMIT_TRUSTED_PROXIES)
+
+
+def client_ip(request: Request) -> str:
+    """
+    Address of the client, read from X-Forwarded-For when the request comes
+    from one of RATE_LIMIT_TRUSTED_PROXIES. Each proxy appends the address it
+    received the request from, so the client is the rightmost entry that is
+    not a trusted proxy; the entries left of it can be forged by the client.
+    """
+    host = request.client.host if request.client else "unknown"
+    if not _is_trusted_proxy(host):
+        return host
+    forwarded = request.headers.get("X-Forwarded-For", "")
+    for hop in reversed([h.strip() for h in forwarded.split(",") if h.strip()]):
+        if not _is_trusted_proxy(hop):
+            return hop
+        host = hop
+    return host
+
+
+class RateLimiter:
+    """
+    Dependency rejecting requests over `limit` per `period` seconds with 429.
+
+    Hits are counted per client IP, or per user for requests carrying a valid
+    access token when `per_user` is set. Attach it before any dependency that
+    opens a database session so that rejected requests cost one Redis call:
+
+        @router.post("/path", dependencies=[Depends(RateLimiter(...))])
+    """
+
+    def __init__(
+        self,
+        name: str,
+        limit: int,
+        period: float,
+        algorithm: rate_limit.Algorithm = "token_bucket",
+        per_user: bool = False,
+    ) -> None:
+        self.name = name
+        self.limit = limit
+        self.period = period
+        self.algorithm = algorithm
+        self.per_user = per_user
+
+    def _identify(self, request: Request) -> str:
+        if self.per_user:
+            scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+            if scheme.lower() == "bearer" and token:
+                try:
+                    sub = security.decode_access_token(token).get("sub")
+                except InvalidTokenError:
+                    sub = None
+                if sub:
+                    return f"user:{sub}"
+        return f"ip:{client_ip(request)}"
+
+    async def __call__(self, request: Request) -> None:
+        if not settings.RATE_LIMIT_ENABLED:
+            return
+        retry_after = await rate_limit.hit(
+            f"{self.name}:{self._identify(request)}",
+            limit=self.limit,
+            period=self.period,
+            algorithm=self.algorithm,
+        )
+        if retry_after:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests, retry later",
+                headers={"Retry-After": str(math.ceil(retry_after))},
+            )
+
+
+login_rate_limit = RateLimiter(
+    "login", limit=settings.RATE_LIMIT_LOGIN_PER_MINUTE, period=60
+)
+signup_rate_limit = RateLimiter(
+    "signup",
+    limit=settings.RATE_LIMIT_SIGNUP_PER_HOUR,
+    period=3600,
+    algorithm="sliding_window",
+)
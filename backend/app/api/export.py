@@ -0,0 +1,77 @@
+"""
+Streaming table exports
+
+Rows are read through a server side cursor in batches of EXPORT_BATCH_SIZE
+and written to the response as they arrive, so an export of any size keeps
+one batch in memory. The export opens its own session: the request session
+is closed once the handler returns, before the body is streamed.
+"""
+
+import csv
+import io
+from collections.abc import AsyncIterator
+from typing import Any, Literal
+
+from fastapi.responses import StreamingResponse
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlmodel.sql.expression import SelectOfScalar
+
+from app.core.config import settings
+from app.core.db import async_engine
+
+ExportFormat = Literal["ndjson", "csv"]
+
+MEDIA_TYPES: dict[ExportFormat, str] = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+async def stream_rows(statement: SelectOfScalar[Any]) -> AsyncIterator[list[Any]]:
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        result = await session.stream_scalars(
+            statement.execution_options(yield_per=settings.EXPORT_BATCH_SIZE)
+        )
+        async for batch in result.partitions():
+            # The identity map holds rows weakly, written batches are freed
+            yield list(batch)
+
+
+async def encode_rows(
+    batches: AsyncIterator[list[Any]], schema: type[SQLModel], format: ExportFormat
+) -> AsyncIterator[str]:
+    if format == "ndjson":
+        async for batch in batches:
+            yield "".join(
+                schema.model_validate(row).model_dump_json() + "\n" for row in batch
+            )
+        return
+
+    fields = list(schema.model_fields)
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fields)
+    writer.writeheader()
+    async for batch in batches:
+        writer.writerows(
+            schema.model_validate(row).model_dump(mode="json") for row in batch
+        )
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def export_response(
+    statement: SelectOfScalar[Any],
+    schema: type[SQLModel],
+    format: ExportFormat,
+    filename: str,
+) -> StreamingResponse:
+    """Stream the rows of `statement` serialized with `schema`"""
+    return StreamingResponse(
+        encode_rows(stream_rows(statement), schema, format),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{format}"'},
+    )
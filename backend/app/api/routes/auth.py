@@ -10,10 +10,10 @@
 from datetime import timedelta
 from typing import Any
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 
 from app import crud
-from app.api.deps import CurrentUser, SessionDep
+from app.api.deps import AsyncSessionDep, CurrentUser, login_rate_limit
 from app.core import security
 from app.core.config import settings
 from app.models import (
@@ -48,7 +48,7 @@ async def send_sms_code(body: SendSmsRequest) -> Message:
 
 
 @router.post("/phone/register", response_model=Token)
-async def phone_register(session: SessionDep, body: PhoneRegister) -> Token:
+async def phone_register(session: AsyncSessionDep, body: PhoneRegister) -> Token:
     """
     手机号注册
 
@@ -56,16 +56,18 @@ async def phone_register(session: SessionDep, body: PhoneRegister) -> Token:
     - 返回 JWT Token
     """
     # 验证验证码
-    if not sms.verify_code(body.phone, body.code):
+    if not await sms.verify_code(body.phone, body.code):
         raise HTTPException(status_code=400, detail="验证码错误或已过期")
 
     # 检查手机号是否已注册
-    existing_user = crud.get_user_by_phone(session=session, phone=body.phone)
+    existing_user = await crud.get_user_by_phone_async(
+        session=session, phone=body.phone
+    )
     if existing_user:
         raise HTTPException(status_code=400, detail="该手机号已注册")
 
     # 创建用户
-    user = crud.create_user_by_phone(
+    user = await crud.create_user_by_phone_async(
         session=session, phone=body.phone, nickname=body.nickname
     )
 
@@ -78,8 +80,10 @@ async def phone_register(session: SessionDep, body: PhoneRegister) -> Token:
     )
 
 
-@router.post("/phone/login", response_model=Token)
-async def phone_login(session: SessionDep, body: PhoneSmsLogin) -> Token:
+@router.post(
+    "/phone/login", response_model=Token, dependencies=[Depends(login_rate_limit)]
+)
+async def phone_login(session: AsyncSessionDep, body: PhoneSmsLogin) -> Token:
     """
     手机号验证码登录
 
@@ -88,14 +92,14 @@ async def phone_login(session: SessionDep, body: PhoneSmsLogin) -> Token:
     - 返回 JWT Token
     """
     # 验证验证码
-    if not sms.verify_code(body.phone, body.code):
+    if not await sms.verify_code(body.phone, body.code):
         raise HTTPException(status_code=400, detail="验证码错误或已过期")
 
     # 查找或创建用户
-    user = crud.get_user_by_phone(session=session, phone=body.phone)
+    user = await crud.get_user_by_phone_async(session=session, phone=body.phone)
     if not user:
         # 自动注册新用户
-        user = crud.create_user_by_phone(session=session, phone=body.phone)
+        user = await crud.create_user_by_phone_async(session=session, phone=body.phone)
 
     if not user.is_active:
         raise HTTPException(status_code=400, detail="用户已被禁用")
@@ -109,9 +113,13 @@ async def phone_login(session: SessionDep, body: PhoneSmsLogin) -> Token:
     )
 
 
-@router.post("/wechat/login", response_model=WechatLoginResponse)
+@router.post(
+    "/wechat/login",
+    response_model=WechatLoginResponse,
+    dependencies=[Depends(login_rate_limit)],
+)
 async def wechat_login_endpoint(
-    session: SessionDep, body: WechatLoginRequest
+    session: AsyncSessionDep, body: WechatLoginRequest
 ) -> WechatLoginResponse:
     """
     微信登录
@@ -125,27 +133,11 @@ async def wechat_login_endpoint(
     except WechatServiceError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-    # 先尝试通过 UnionID 查找（跨应用用户识别）
-    user = None
-    if wechat_info.unionid:
-        user = crud.get_user_by_wechat_unionid(
-            session=session, unionid=wechat_info.unionid
-        )
-
-    # 再尝试通过 OpenID 查找
-    if not user:
-        user = crud.get_user_by_wechat_openid(
-            session=session, openid=wechat_info.openid
-        )
-
-    # 如果是新用户，创建用户记录
-    if not user:
-        user = crud.create_user_by_wechat(session=session, wechat_info=wechat_info)
-    else:
-        # 更新微信信息（头像、昵称可能变化）
-        user = crud.update_user_wechat_info(
-            session=session, db_user=user, wechat_info=wechat_info
-        )
+    # 按 UnionID（跨应用用户识别）或 OpenID 查找用户, 新用户则创建,
+    # 老用户更新微信信息（头像、昵称可能变化）, 一次数据库往返完成
+    user = await crud.upsert_user_by_wechat_async(
+        session=session, wechat_info=wechat_info
+    )
 
     if not user.is_active:
         raise HTTPException(status_code=400, detail="用户已被禁用")
@@ -168,7 +160,7 @@ async def wechat_login_endpoint(
 
 @router.post("/bind-phone", response_model=UserPublic)
 async def bind_phone(
-    session: SessionDep, current_user: CurrentUser, body: BindPhoneRequest
+    session: AsyncSessionDep, current_user: CurrentUser, body: BindPhoneRequest
 ) -> Any:
     """
     绑定手机号
@@ -177,16 +169,18 @@ async def bind_phone(
     - 验证码验证通过后绑定手机号
     """
     # 验证验证码
-    if not sms.verify_code(body.phone, body.code):
+    if not await sms.verify_code(body.phone, body.code):
         raise HTTPException(status_code=400, detail="验证码错误或已过期")
 
     # 检查手机号是否已被其他用户使用
-    existing_user = crud.get_user_by_phone(session=session, phone=body.phone)
+    existing_user = await crud.get_user_by_phone_async(
+        session=session, phone=body.phone
+    )
     if existing_user and existing_user.id != current_user.id:
         raise HTTPException(status_code=400, detail="该手机号已被其他账号绑定")
 
     # 绑定手机号
-    user = crud.bind_phone_to_user(
+    user = await crud.bind_phone_to_user_async(
         session=session, db_user=current_user, phone=body.phone
     )
 
@@ -194,7 +188,7 @@ async def bind_phone(
 
 
 @router.get("/me", response_model=UserPublic)
-def get_current_user(current_user: CurrentUser) -> Any:
+async def get_current_user(current_user: CurrentUser) -> Any:
     """
     获取当前登录用户信息
     """
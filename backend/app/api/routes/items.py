@@ -1,52 +1,203 @@
 import uuid
-from typing import Any
+from collections.abc import Sequence
+from typing import Annotated, Any
 
-from fastapi import APIRouter, HTTPException
-from sqlmodel import func, select
+from fastapi import APIRouter, Body, HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy import update
+from sqlmodel import col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.api.deps import CurrentUser, SessionDep
-from app.models import Item, ItemCreate, ItemPublic, ItemsPublic, ItemUpdate, Message
+from app import crud
+from app.api.deps import AsyncSessionDep, CurrentUser
+from app.api.export import ExportFormat, export_response
+from app.core.config import settings
+from app.models import (
+    Item,
+    ItemBulkError,
+    ItemBulkUpdate,
+    ItemCreate,
+    ItemPublic,
+    ItemsBulkDeleted,
+    ItemsBulkPublic,
+    ItemsPublic,
+    ItemUpdate,
+    Message,
+)
+from app.utils import decode_cursor, encode_cursor
 
 router = APIRouter(prefix="/items", tags=["items"])
 
 
 @router.get("/", response_model=ItemsPublic)
-def read_items(
-    session: SessionDep, current_user: CurrentUser, skip: int = 0, limit: int = 100
+async def read_items(
+    session: AsyncSessionDep,
+    current_user: CurrentUser,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: str | None = None,
+    include_count: bool = True,
+    approximate_count: bool = False,
 ) -> Any:
     """
     Retrieve items.
+
+    Pass the returned `next_cursor` as `cursor` to fetch the following page,
+    `skip` is ignored when a cursor is given. Follow-up pages usually don't
+    need `include_count`; `approximate_count` returns the planner estimate
+    for superusers instead of counting the whole table.
     """
+    after_id = None
+    if cursor:
+        after_id = decode_cursor(cursor)
+        if after_id is None:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    filters = []
+    if not current_user.is_superuser:
+        filters.append(col(Item.owner_id) == current_user.id)
 
-    if current_user.is_superuser:
-        count_statement = select(func.count()).select_from(Item)
-        count = session.exec(count_statement).one()
-        statement = select(Item).offset(skip).limit(limit)
-        items = session.exec(statement).all()
-    else:
-        count_statement = (
-            select(func.count())
-            .select_from(Item)
-            .where(Item.owner_id == current_user.id)
-        )
-        count = session.exec(count_statement).one()
-        statement = (
-            select(Item)
-            .where(Item.owner_id == current_user.id)
-            .offset(skip)
-            .limit(limit)
+    items, count = await crud.read_page_async(
+        session=session,
+        model=Item,
+        filters=filters,
+        skip=skip,
+        limit=limit,
+        after_id=after_id,
+        include_count=include_count,
+        approximate_count=approximate_count,
+    )
+    next_cursor = encode_cursor(items[-1].id) if items and len(items) == limit else None
+
+    return ItemsPublic(data=items, count=count, next_cursor=next_cursor)
+
+
+@router.get("/export")
+async def export_items(
+    current_user: CurrentUser, format: ExportFormat = "ndjson"
+) -> StreamingResponse:
+    """
+    Export items as NDJSON or CSV, streamed in id order.
+    """
+    statement = select(Item).order_by(col(Item.id))
+    if not current_user.is_superuser:
+        statement = statement.where(col(Item.owner_id) == current_user.id)
+    return export_response(statement, ItemPublic, format, "items")
+
+
+BULK_BODY = Body(min_length=1, max_length=settings.ITEMS_BULK_MAX_SIZE)
+
+
+async def _bulk_errors(
+    session: AsyncSession, ids: Sequence[uuid.UUID], applied: set[uuid.UUID]
+) -> list[ItemBulkError]:
+    """
+    Errors of the rows of a bulk request that were not applied.
+
+    Repeated ids are only applied at their first position. Rows that were
+    not applied are told apart by one lookup of the ids that exist.
+    """
+    errors = []
+    seen = set()
+    missing = {}
+    for index, item_id in enumerate(ids):
+        if item_id in seen:
+            errors.append(ItemBulkError(index=index, id=item_id, detail="Duplicate id"))
+            continue
+        seen.add(item_id)
+        if item_id not in applied:
+            missing[index] = item_id
+    if missing:
+        existing = await crud.get_existing_item_ids_async(
+            session=session, ids=list(missing.values())
         )
-        items = session.exec(statement).all()
+        for index, item_id in missing.items():
+            detail = (
+                "Not enough permissions" if item_id in existing else "Item not found"
+            )
+            errors.append(ItemBulkError(index=index, id=item_id, detail=detail))
+    errors.sort(key=lambda error: error.index)
+    return errors
+
+
+@router.post("/bulk", response_model=ItemsBulkPublic)
+async def create_items_bulk(
+    *,
+    session: AsyncSessionDep,
+    current_user: CurrentUser,
+    items_in: Annotated[list[ItemCreate], BULK_BODY],
+) -> Any:
+    """
+    Create items in bulk.
+
+    Every item is validated before anything is written, then all of them are
+    inserted in one transaction. `data` follows the request order.
+    """
+    items = await crud.create_items_async(
+        session=session, items_in=items_in, owner_id=current_user.id
+    )
+    return ItemsBulkPublic(data=items, errors=[])
+
+
+@router.patch("/bulk", response_model=ItemsBulkPublic)
+async def update_items_bulk(
+    *,
+    session: AsyncSessionDep,
+    current_user: CurrentUser,
+    items_in: Annotated[list[ItemBulkUpdate], BULK_BODY],
+) -> Any:
+    """
+    Update items in bulk.
 
-    return ItemsPublic(data=items, count=count)
+    Only the fields present in a row are changed. Rows that can't be applied
+    are listed in `errors` by their position in the request, the others are
+    written in one transaction. `data` follows the request order.
+    """
+    unique: dict[uuid.UUID, ItemBulkUpdate] = {}
+    for item_in in items_in:
+        unique.setdefault(item_in.id, item_in)
+    items = await crud.update_items_async(
+        session=session,
+        items_in=list(unique.values()),
+        owner_id=None if current_user.is_superuser else current_user.id,
+    )
+    ids = [item_in.id for item_in in items_in]
+    errors = await _bulk_errors(session, ids, {item.id for item in items})
+    position = {item_id: index for index, item_id in reversed(list(enumerate(ids)))}
+    data = sorted(items, key=lambda item: position[item.id])
+    return ItemsBulkPublic(data=data, errors=errors)
+
+
+@router.delete("/bulk", response_model=ItemsBulkDeleted)
+async def delete_items_bulk(
+    *,
+    session: AsyncSessionDep,
+    current_user: CurrentUser,
+    ids: Annotated[list[uuid.UUID], BULK_BODY],
+) -> Any:
+    """
+    Delete items in bulk.
+
+    Takes a list of item ids. Items that can't be deleted are listed in
+    `errors` by their position in the request, the others are deleted in one
+    transaction.
+    """
+    deleted = await crud.delete_items_async(
+        session=session,
+        ids=ids,
+        owner_id=None if current_user.is_superuser else current_user.id,
+    )
+    errors = await _bulk_errors(session, ids, set(deleted))
+    return ItemsBulkDeleted(ids=deleted, errors=errors)
 
 
 @router.get("/{id}", response_model=ItemPublic)
-def read_item(session: SessionDep, current_user: CurrentUser, id: uuid.UUID) -> Any:
+async def read_item(
+    session: AsyncSessionDep, current_user: CurrentUser, id: uuid.UUID
+) -> Any:
     """
     Get item by ID.
     """
-    item = session.get(Item, id)
+    item = await session.get(Item, id)
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
     if not current_user.is_superuser and (item.owner_id != current_user.id):
@@ -55,23 +206,22 @@ def read_item(session: SessionDep, current_user: CurrentUser, id: uuid.UUID) ->
 
 
 @router.post("/", response_model=ItemPublic)
-def create_item(
-    *, session: SessionDep, current_user: CurrentUser, item_in: ItemCreate
+async def create_item(
+    *, session: AsyncSessionDep, current_user: CurrentUser, item_in: ItemCreate
 ) -> Any:
     """
     Create new item.
     """
     item = Item.model_validate(item_in, update={"owner_id": current_user.id})
     session.add(item)
-    session.commit()
-    session.refresh(item)
+    await session.commit()
     return item
 
 
 @router.put("/{id}", response_model=ItemPublic)
-def update_item(
+async def update_item(
     *,
-    session: SessionDep,
+    session: AsyncSessionDep,
     current_user: CurrentUser,
     id: uuid.UUID,
     item_in: ItemUpdate,
@@ -79,31 +229,38 @@ def update_item(
     """
     Update an item.
     """
-    item = session.get(Item, id)
+    update_dict = item_in.model_dump(exclude_unset=True)
+    statement = update(Item).where(col(Item.id) == id)
+    if not current_user.is_superuser:
+        statement = statement.where(col(Item.owner_id) == current_user.id)
+    if update_dict:
+        statement = statement.values(update_dict)
+    else:
+        # Nothing to change, still go through the same permission check
+        statement = statement.values(id=Item.id)
+    # Update and read back the row in one round trip, the item is only
+    # loaded separately to tell a missing item from a foreign one.
+    item = (await session.scalars(statement.returning(Item))).one_or_none()
+    await session.commit()
     if not item:
+        if await session.get(Item, id):
+            raise HTTPException(status_code=400, detail="Not enough permissions")
         raise HTTPException(status_code=404, detail="Item not found")
-    if not current_user.is_superuser and (item.owner_id != current_user.id):
-        raise HTTPException(status_code=400, detail="Not enough permissions")
-    update_dict = item_in.model_dump(exclude_unset=True)
-    item.sqlmodel_update(update_dict)
-    session.add(item)
-    session.commit()
-    session.refresh(item)
     return item
 
 
 @router.delete("/{id}")
-def delete_item(
-    session: SessionDep, current_user: CurrentUser, id: uuid.UUID
+async def delete_item(
+    session: AsyncSessionDep, current_user: CurrentUser, id: uuid.UUID
 ) -> Message:
     """
     Delete an item.
     """
-    item = session.get(Item, id)
+    item = await session.get(Item, id)
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
     if not current_user.is_superuser and (item.owner_id != current_user.id):
         raise HTTPException(status_code=400, detail="Not enough permissions")
-    session.delete(item)
-    session.commit()
+    await session.delete(item)
+    await session.commit()
     return Message(message="Item deleted successfully")
@@ -1,8 +1,12 @@
-from fastapi import APIRouter, Depends
+from typing import Any
+
+from fastapi import APIRouter, Depends, Response
 from pydantic.networks import EmailStr
 
 from app.api.deps import get_current_active_superuser
-from app.models import Message
+from app.core.db import async_engine, engine, get_pool_status
+from app.core.health import health_checker
+from app.models import HealthReport, Message
 from app.utils import generate_test_email, send_email
 
 router = APIRouter(prefix="/utils", tags=["utils"])
@@ -26,6 +30,47 @@ def test_email(email_to: EmailStr) -> Message:
     return Message(message="Test email sent")
 
 
+@router.get(
+    "/db-pool/",
+    dependencies=[Depends(get_current_active_superuser)],
+)
+async def db_pool_status() -> dict[str, dict[str, float]]:
+    """
+    Connection pool gauges of this worker process.
+    """
+    return {
+        "sync": get_pool_status(engine),
+        "async": get_pool_status(async_engine),
+    }
+
+
 @router.get("/health-check/")
 async def health_check() -> bool:
     return True
+
+
+@router.get("/health/live/")
+async def liveness() -> Message:
+    """
+    Liveness, the process serves requests. Dependencies are not probed, a
+    database outage must not get every worker restarted.
+    """
+    return Message(message="OK")
+
+
+@router.get(
+    "/health/ready/",
+    response_model=HealthReport,
+    # Error messages name hosts, roles and DNS failures, they are only logged
+    response_model_exclude={"dependencies": {"__all__": {"error"}}},
+    responses={503: {"model": HealthReport}},
+)
+async def readiness(response: Response) -> Any:
+    """
+    Readiness, 503 while a critical dependency is down. The report is cached
+    for HEALTH_CHECK_CACHE_SECONDS.
+    """
+    report = await health_checker.check()
+    if report.status == "unavailable":
+        response.status_code = 503
+    return report
@@ -0,0 +1,178 @@
+"""
+In-process caches for the authentication hot path
+
+The authenticated User principal is cached per worker in a TTL LRU and,
+with USER_CACHE_REDIS, in Redis so that all workers share warm entries.
+Writes to a user go through invalidate_user / invalidate_user_async, which
+can only clear the local copy of the calling worker. Other workers' copies
+expire after USER_CACHE_TTL_SECONDS at the latest; with the Redis layer,
+which is cleared on every write, the local copies only live for
+USER_CACHE_LOCAL_TTL_SECONDS so that a deactivated user is refused quickly.
+"""
+
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Generic, TypeVar
+
+import redis
+from pydantic import ValidationError
+from sqlalchemy.orm import make_transient_to_detached
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+from app.core.redis_client import get_redis
+from app.models import User, UserPublic
+
+logger = logging.getLogger(__name__)
+
+K = TypeVar("K")
+V = TypeVar("V")
+
+
+class TTLCache(Generic[K, V]):
+    """Thread safe LRU whose entries also expire after a time to live"""
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[K, tuple[float, V]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: K) -> V | None:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: K, value: V, ttl: float | None = None) -> None:
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: K) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+# Redis key 前缀
+USER_CACHE_PREFIX = "auth:user:"
+
+user_cache: TTLCache[str, dict[str, Any]] = TTLCache(
+    maxsize=settings.USER_CACHE_SIZE, ttl=settings.USER_CACHE_TTL_SECONDS
+)
+
+_redis_client: redis.Redis | None = None
+
+
+def _get_redis() -> redis.Redis:
+    global _redis_client
+    if _redis_client is None:
+        _redis_client = redis.from_url(  # type: ignore[no-untyped-call]
+            settings.REDIS_URL, decode_responses=True
+        )
+    return _redis_client
+
+
+def _user_key(user_id: str) -> str:
+    return f"{USER_CACHE_PREFIX}{user_id}"
+
+
+def _local_ttl() -> int:
+    if settings.USER_CACHE_REDIS:
+        return settings.USER_CACHE_LOCAL_TTL_SECONDS
+    return settings.USER_CACHE_TTL_SECONDS
+
+
+async def get_user(user_id: str) -> dict[str, Any] | None:
+    """Cached public fields of the user, None on a miss"""
+    data = user_cache.get(user_id)
+    if data is not None or not settings.USER_CACHE_REDIS:
+        return data
+    try:
+        raw = await get_redis().get(_user_key(user_id))
+    except redis.RedisError as e:
+        logger.warning(f"User cache read failed: {e}")
+        return None
+    if raw is None:
+        return None
+    data = json.loads(raw)
+    user_cache.set(user_id, data, ttl=_local_ttl())
+    return data
+
+
+async def set_user(user: User) -> None:
+    # Only the public fields, the password hash never leaves the database
+    data = UserPublic.model_validate(user).model_dump(mode="json")
+    user_cache.set(str(user.id), data, ttl=_local_ttl())
+    if not settings.USER_CACHE_REDIS:
+        return
+    try:
+        await get_redis().setex(
+            _user_key(str(user.id)),
+            settings.USER_CACHE_TTL_SECONDS,
+            json.dumps(data),
+        )
+    except redis.RedisError as e:
+        logger.warning(f"User cache write failed: {e}")
+
+
+def invalidate_user(user_id: Any) -> None:
+    user_cache.pop(str(user_id))
+    if not settings.USER_CACHE_REDIS:
+        return
+    try:
+        _get_redis().delete(_user_key(str(user_id)))
+    except redis.RedisError as e:
+        logger.warning(f"User cache invalidation failed: {e}")
+
+
+async def invalidate_user_async(user_id: Any) -> None:
+    user_cache.pop(str(user_id))
+    if not settings.USER_CACHE_REDIS:
+        return
+    try:
+        await get_redis().delete(_user_key(str(user_id)))
+    except redis.RedisError as e:
+        logger.warning(f"User cache invalidation failed: {e}")
+
+
+def attach_user(session: AsyncSession, data: dict[str, Any]) -> User | None:
+    """
+    Rebuild a persistent User from cached data without loading it.
+
+    The password hash is left expired, load it explicitly with
+    `await session.refresh(user, ["hashed_password"])` where it is needed.
+    """
+    try:
+        public = UserPublic.model_validate(data)
+    except ValidationError:
+        return None
+    user = User(**public.model_dump(), hashed_password="")
+    make_transient_to_detached(user)
+    session.add(user)
+    session.expire(user, ["hashed_password"])
+    return user
@@ -32,14 +32,16 @@ celery_app.conf.task_routes = {
     "app.tasks.email.*": {"queue": "email"},
     "app.tasks.ai.*": {"queue": "ai"},
     "app.tasks.ocr.*": {"queue": "ocr"},
+    # 短信服务商调用较慢, 单独的队列避免阻塞其他任务
+    "app.tasks.sms.*": {"queue": "sms"},
 }
 
 # 定时任务配置 (Celery Beat)
 celery_app.conf.beat_schedule = {
-    # 示例：每天凌晨1点清理过期数据
+    # 每小时清理过期数据, 每次运行有时间预算, 没清理完的留给下一次
     "cleanup-expired-data": {
         "task": "app.tasks.maintenance.cleanup_expired_data",
-        "schedule": crontab(hour=1, minute=0),
+        "schedule": crontab(minute=0),
     },
 }
 
@@ -7,6 +7,7 @@ from pydantic import (
     BeforeValidator,
     EmailStr,
     HttpUrl,
+    IPvAnyNetwork,
     PostgresDsn,
     computed_field,
     model_validator,
@@ -68,6 +69,17 @@ class Settings(BaseSettings):
             path=self.POSTGRES_DB,
         )
 
+    # Connection pool, sized per worker process (the Dockerfile runs 4 workers)
+    POSTGRES_POOL_SIZE: int = 5
+    POSTGRES_MAX_OVERFLOW: int = 10
+    POSTGRES_POOL_TIMEOUT: float = 30.0
+    POSTGRES_POOL_RECYCLE: int = 1800
+    POSTGRES_POOL_PRE_PING: bool = True
+    # 0 disables the server side statement timeout
+    POSTGRES_STATEMENT_TIMEOUT_MS: int = 0
+    # Running behind PgBouncer in transaction mode: no prepared statements
+    POSTGRES_PGBOUNCER: bool = False
+
     SMTP_TLS: bool = True
     SMTP_SSL: bool = False
     SMTP_PORT: int = 587
@@ -76,6 +88,9 @@ class Settings(BaseSettings):
     SMTP_PASSWORD: str | None = None
     EMAILS_FROM_EMAIL: EmailStr | None = None
     EMAILS_FROM_NAME: str | None = None
+    # 每个进程保持的 SMTP 连接数, 空闲超过此秒数的连接会被关闭
+    SMTP_POOL_SIZE: int = 2
+    SMTP_POOL_MAX_IDLE_SECONDS: int = 60
 
     @model_validator(mode="after")
     def _set_default_emails_from(self) -> Self:
@@ -96,9 +111,82 @@ class Settings(BaseSettings):
 
     # Redis and Celery配置
     REDIS_URL: str = "redis://redis:6379/0"
+    # 每个进程的异步 Redis 连接池大小, 连接用尽时最多等待的秒数
+    REDIS_MAX_CONNECTIONS: int = 50
+    REDIS_POOL_TIMEOUT: float = 5.0
     CELERY_BROKER_URL: str = "redis://redis:6379/0"
     CELERY_RESULT_BACKEND: str = "redis://redis:6379/0"
 
+    # 健康检查: 每个依赖探测的超时, 以及就绪检查结果的缓存时间,
+    # 负载均衡高频探测时不会每次都访问依赖
+    HEALTH_CHECK_TIMEOUT_SECONDS: float = 2.0
+    HEALTH_CHECK_CACHE_SECONDS: float = 5.0
+
+    # /metrics 的 Bearer 令牌, 为空时不校验, 此时应只在内网暴露
+    METRICS_TOKEN: str | None = None
+    # Celery worker 暴露指标的端口, 为空时不启动
+    CELERY_METRICS_PORT: int | None = None
+
+    # 认证用户缓存: 每个 worker 的 LRU, 可选 Redis 共享层
+    # 停用、删除用户或修改权限时只能清除当前 worker 的本地缓存 (和 Redis),
+    # 其他 worker 最多在本地 TTL 内仍接受该用户的令牌:
+    # 不开 Redis 时为 USER_CACHE_TTL_SECONDS, 开启时为 USER_CACHE_LOCAL_TTL_SECONDS
+    USER_CACHE_TTL_SECONDS: int = 60
+    USER_CACHE_SIZE: int = 10_000
+    USER_CACHE_REDIS: bool = False
+    # 开启 Redis 共享层时本地 LRU 的 TTL, Redis 中的条目会被同步清除
+    USER_CACHE_LOCAL_TTL_SECONDS: int = 5
+    # 密码哈希进程池, 0 表示在线程中计算
+    PASSWORD_HASH_WORKERS: int = 2
+    # 排队中的哈希超过此数量时直接返回 503
+    PASSWORD_HASH_MAX_PENDING: int = 32
+
+    # 密码哈希方案, 默认本地用 bcrypt, staging/production 用 argon2id
+    # 旧方案或旧成本的哈希会在登录时自动重新计算
+    PASSWORD_HASH_SCHEME: Literal["bcrypt", "argon2"] | None = None
+    PASSWORD_BCRYPT_ROUNDS: int = 12
+    PASSWORD_ARGON2_TIME_COST: int = 3
+    # KiB
+    PASSWORD_ARGON2_MEMORY_COST: int = 64 * 1024
+    PASSWORD_ARGON2_PARALLELISM: int = 4
+
+    @model_validator(mode="after")
+    def _set_default_password_hash_scheme(self) -> Self:
+        if not self.PASSWORD_HASH_SCHEME:
+            self.PASSWORD_HASH_SCHEME = (
+                "bcrypt" if self.ENVIRONMENT == "local" else "argon2"
+            )
+        return self
+
+    # 已验证的 JWT 缓存条目数
+    TOKEN_CACHE_SIZE: int = 10_000
+
+    # 接口限流, 按客户端 IP 计数
+    RATE_LIMIT_ENABLED: bool = True
+    # 受信任的反向代理地址或网段 (逗号分隔, 如 172.16.0.0/12), 直连地址在其中时
+    # 从 X-Forwarded-For 取客户端 IP; 为空时只用直连地址, 部署在代理之后
+    # 必须配置, 否则所有请求共用代理的一个限流额度
+    RATE_LIMIT_TRUSTED_PROXIES: Annotated[
+        list[IPvAnyNetwork] | str, BeforeValidator(parse_cors)
+    ] = []
+    # 登录接口 (密码, 短信, 微信) 每分钟请求数, 令牌桶允许突发
+    RATE_LIMIT_LOGIN_PER_MINUTE: int = 30
+    # 注册接口每小时请求数, 滑动窗口
+    RATE_LIMIT_SIGNUP_PER_HOUR: int = 10
+
+    # 批量创建、更新、删除 item 的接口每次请求最多处理的条数
+    ITEMS_BULK_MAX_SIZE: int = 5000
+    # 导出接口每批从服务端游标读取的行数
+    EXPORT_BATCH_SIZE: int = 1000
+    # 删除用户时后台任务每个事务删除的 item 数, 避免长事务和长时间持有锁
+    USER_DELETE_BATCH_SIZE: int = 1000
+    # 清理任务每批处理的 Redis key 数和数据库行数
+    CLEANUP_BATCH_SIZE: int = 500
+    # 清理任务每次运行的时间预算, 用完后剩余的数据留给下一次运行
+    CLEANUP_TIME_BUDGET_SECONDS: int = 120
+    # 申请删除超过这个时间仍未删完的用户, 由清理任务接着删除
+    CLEANUP_DELETED_USER_GRACE_MINUTES: int = 60
+
     # Qdrant向量数据库配置
     QDRANT_URL: str = "http://qdrant:6333"
 
@@ -106,19 +194,48 @@ class Settings(BaseSettings):
     OPENAI_API_KEY: str | None = None
     ANTHROPIC_API_KEY: str | None = None
 
+    # 调用第三方 API 的共享 HTTP 客户端 (每个进程一个连接池)
+    HTTP_CLIENT_MAX_CONNECTIONS: int = 100
+    HTTP_CLIENT_MAX_KEEPALIVE: int = 20
+    HTTP_CLIENT_KEEPALIVE_EXPIRY: float = 60.0
+    HTTP_CLIENT_TIMEOUT: float = 10.0
+    HTTP_CLIENT_CONNECT_TIMEOUT: float = 5.0
+
     # 微信开放平台配置
     WECHAT_APP_ID: str | None = None
     WECHAT_APP_SECRET: str | None = None
+    # 微信用户信息 (昵称、头像) 缓存秒数, 缓存期内登录不再调用用户信息接口
+    WECHAT_PROFILE_CACHE_TTL_SECONDS: int = 24 * 60 * 60
 
     # 短信服务配置 (阿里云)
     SMS_ACCESS_KEY_ID: str | None = None
     SMS_ACCESS_KEY_SECRET: str | None = None
     SMS_SIGN_NAME: str | None = None
     SMS_TEMPLATE_CODE: str | None = None
+    # 短信服务商, 未设置时配置了阿里云密钥则用 aliyun, 否则用只打印验证码的 stub
+    SMS_PROVIDER: Literal["aliyun", "stub"] | None = None
+    # stub 服务商模拟的调用延迟, 用于压测
+    SMS_STUB_LATENCY_MS: int = 0
+
+    @model_validator(mode="after")
+    def _set_default_sms_provider(self) -> Self:
+        if not self.SMS_PROVIDER:
+            configured = all(
+                [
+                    self.SMS_ACCESS_KEY_ID,
+                    self.SMS_ACCESS_KEY_SECRET,
+                    self.SMS_SIGN_NAME,
+                    self.SMS_TEMPLATE_CODE,
+                ]
+            )
+            self.SMS_PROVIDER = "aliyun" if configured else "stub"
+        return self
 
     # 验证码配置
     SMS_CODE_EXPIRE_MINUTES: int = 5
     SMS_CODE_LENGTH: int = 6
+    # 同一验证码允许的最大失败次数, 超过后验证码作废
+    SMS_CODE_MAX_ATTEMPTS: int = 5
 
     def _check_default_secret(self, var_name: str, value: str | None) -> None:
         if value == "changethis":
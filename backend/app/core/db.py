@@ -1,10 +1,136 @@
+import threading
+import time
+from typing import Any
+
+from sqlalchemy import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from sqlmodel import Session, create_engine, select
 
 from app import crud
 from app.core.config import settings
+from app.core.metrics import (
+    DB_POOL_CHECKOUT_WAIT,
+    DB_POOL_IN_USE,
+    DB_POOL_OVERFLOW,
+    DB_POOL_SIZE,
+    instrument_engine,
+)
 from app.models import User, UserCreate
 
-engine = create_engine(str(settings.SQLALCHEMY_DATABASE_URI))
+
+class PoolStats:
+    """Checkout wait times of one connection pool, shared across its recreations"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def observe_wait(self, seconds: float) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+
+
+class _TimedCheckoutMixin:
+    stats: PoolStats
+    # engine label of the pool metrics
+    metrics_name: str
+
+    def _do_get(self) -> Any:
+        start = time.perf_counter()
+        try:
+            return super()._do_get()  # type: ignore[misc]
+        finally:
+            seconds = time.perf_counter() - start
+            self.stats.observe_wait(seconds)
+            DB_POOL_CHECKOUT_WAIT.labels(engine=self.metrics_name).observe(seconds)
+            self._update_gauges()
+
+    def _do_return_conn(self, record: Any) -> None:
+        try:
+            super()._do_return_conn(record)  # type: ignore[misc]
+        finally:
+            self._update_gauges()
+
+    def _update_gauges(self) -> None:
+        pool: QueuePool = self  # type: ignore[assignment]
+        DB_POOL_SIZE.labels(engine=self.metrics_name).set(pool.size())
+        DB_POOL_IN_USE.labels(engine=self.metrics_name).set(pool.checkedout())
+        DB_POOL_OVERFLOW.labels(engine=self.metrics_name).set(max(pool.overflow(), 0))
+
+
+class TimedQueuePool(_TimedCheckoutMixin, QueuePool):
+    stats = PoolStats()
+    metrics_name = "sync"
+
+
+class TimedAsyncQueuePool(_TimedCheckoutMixin, AsyncAdaptedQueuePool):
+    stats = PoolStats()
+    metrics_name = "async"
+
+
+def _engine_options() -> dict[str, Any]:
+    connect_args: dict[str, Any] = {}
+    if settings.POSTGRES_PGBOUNCER:
+        # PgBouncer in transaction mode hands each transaction to a different
+        # server connection, prepared statements would not be found there.
+        # It also rejects the "options" startup parameter, so a statement
+        # timeout has to be configured on the database role instead.
+        connect_args["prepare_threshold"] = None
+    elif settings.POSTGRES_STATEMENT_TIMEOUT_MS:
+        connect_args["options"] = (
+            f"-c statement_timeout={settings.POSTGRES_STATEMENT_TIMEOUT_MS}"
+        )
+    return {
+        "pool_size": settings.POSTGRES_POOL_SIZE,
+        "max_overflow": settings.POSTGRES_MAX_OVERFLOW,
+        "pool_timeout": settings.POSTGRES_POOL_TIMEOUT,
+        "pool_recycle": settings.POSTGRES_POOL_RECYCLE,
+        "pool_pre_ping": settings.POSTGRES_POOL_PRE_PING,
+        "connect_args": connect_args,
+    }
+
+
+engine = create_engine(
+    str(settings.SQLALCHEMY_DATABASE_URI),
+    poolclass=TimedQueuePool,
+    **_engine_options(),
+)
+# psycopg 3 speaks asyncio natively, the same URL selects its async dialect
+async_engine = create_async_engine(
+    str(settings.SQLALCHEMY_DATABASE_URI),
+    poolclass=TimedAsyncQueuePool,
+    **_engine_options(),
+)
+instrument_engine(engine, "sync")
+instrument_engine(async_engine.sync_engine, "async")
+
+
+def get_pool_status(db_engine: Engine | AsyncEngine) -> dict[str, float]:
+    """Gauges and checkout wait counters for the pool of the given engine"""
+    if isinstance(db_engine, AsyncEngine):
+        db_engine = db_engine.sync_engine
+    pool = db_engine.pool
+    status: dict[str, float] = {}
+    if isinstance(pool, QueuePool):
+        status.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            in_use=pool.checkedout(),
+            overflow=max(pool.overflow(), 0),
+        )
+    if isinstance(pool, _TimedCheckoutMixin):
+        stats = pool.stats
+        status.update(
+            checkouts=stats.checkouts,
+            checkout_wait_seconds_total=stats.wait_seconds_total,
+            checkout_wait_seconds_max=stats.wait_seconds_max,
+        )
+    return status
 
 
 # make sure all SQLModel models are imported (app.models) before initializing DB
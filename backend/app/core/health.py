@@ -0,0 +1,187 @@
+"""
+Dependency health checks
+
+Postgres, Redis and the Celery broker are critical: without them no request
+can be served, and readiness fails. Qdrant and SMTP only back some features,
+their failure reports the service as degraded but still ready. All probes run
+concurrently, each bounded by HEALTH_CHECK_TIMEOUT_SECONDS, and their latency
+is recorded in the health_probe_duration_seconds metric.
+
+The report is cached per process for HEALTH_CHECK_CACHE_SECONDS and
+concurrent callers share one run of the probes, so load balancers polling at
+a high rate don't multiply the load on the dependencies.
+"""
+
+import asyncio
+import logging
+import ssl
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import text
+
+from app.core.celery_app import celery_app
+from app.core.config import settings
+from app.core.db import async_engine
+from app.core.http_client import get_http_client
+from app.core.metrics import HEALTH_PROBE_DURATION
+from app.core.redis_client import get_redis
+from app.models import DependencyHealth, HealthReport
+
+logger = logging.getLogger(__name__)
+
+
+async def probe_postgres() -> None:
+    async with async_engine.connect() as connection:
+        await connection.execute(text("SELECT 1"))
+
+
+async def probe_redis() -> None:
+    await get_redis().ping()
+
+
+def _connect_broker() -> None:
+    timeout = settings.HEALTH_CHECK_TIMEOUT_SECONDS
+    with celery_app.connection_for_read(connect_timeout=timeout) as connection:
+        connection.ensure_connection(max_retries=1, interval_start=0, timeout=timeout)
+
+
+async def probe_broker() -> None:
+    # kombu is blocking, the connect timeout bounds the thread
+    await run_in_threadpool(_connect_broker)
+
+
+async def probe_qdrant() -> None:
+    r = await get_http_client().get(
+        f"{settings.QDRANT_URL}/readyz",
+        timeout=settings.HEALTH_CHECK_TIMEOUT_SECONDS,
+    )
+    r.raise_for_status()
+
+
+async def probe_smtp() -> None:
+    # The greeting proves the server accepts connections, without the cost
+    # of STARTTLS and AUTH
+    assert settings.SMTP_HOST
+    reader, writer = await asyncio.open_connection(
+        settings.SMTP_HOST,
+        settings.SMTP_PORT,
+        ssl=ssl.create_default_context() if settings.SMTP_SSL else None,
+    )
+    try:
+        greeting = await reader.readline()
+        if not greeting.startswith(b"220"):
+            raise ConnectionError(f"Unexpected SMTP greeting {greeting!r}")
+        writer.write(b"QUIT\r\n")
+        await writer.drain()
+    finally:
+        writer.close()
+
+
+@dataclass
+class Dependency:
+    probe: Callable[[], Awaitable[None]]
+    critical: bool
+    enabled: Callable[[], bool] = lambda: True
+
+
+DEPENDENCIES = {
+    "postgres": Dependency(probe_postgres, critical=True),
+    "redis": Dependency(probe_redis, critical=True),
+    "broker": Dependency(probe_broker, critical=True),
+    "qdrant": Dependency(probe_qdrant, critical=False),
+    "smtp": Dependency(
+        probe_smtp, critical=False, enabled=lambda: settings.emails_enabled
+    ),
+}
+
+
+async def check_dependency(name: str) -> DependencyHealth:
+    dependency = DEPENDENCIES[name]
+    if not dependency.enabled():
+        return DependencyHealth(status="disabled", critical=dependency.critical)
+    started = time.perf_counter()
+    error = None
+    try:
+        await asyncio.wait_for(
+            dependency.probe(), timeout=settings.HEALTH_CHECK_TIMEOUT_SECONDS
+        )
+    except asyncio.TimeoutError:
+        error = "Timed out"
+    except Exception as e:
+        error = str(e) or type(e).__name__
+    if error:
+        logger.warning(f"Health probe of {name} failed: {error}")
+    seconds = time.perf_counter() - started
+    HEALTH_PROBE_DURATION.labels(
+        dependency=name, status="error" if error else "ok"
+    ).observe(seconds)
+    return DependencyHealth(
+        status="error" if error else "ok",
+        critical=dependency.critical,
+        latency_ms=round(seconds * 1000, 3),
+        error=error,
+    )
+
+
+async def check_dependencies() -> HealthReport:
+    """Probe every dependency concurrently, bypassing the cache"""
+    results = await asyncio.gather(*map(check_dependency, DEPENDENCIES))
+    dependencies = dict(zip(DEPENDENCIES, results, strict=True))
+    failed = [r for r in results if r.status == "error"]
+    if any(r.critical for r in failed):
+        status = "unavailable"
+    elif failed:
+        status = "degraded"
+    else:
+        status = "ok"
+    return HealthReport(
+        status=status,
+        checked_at=datetime.now(timezone.utc),
+        dependencies=dependencies,
+    )
+
+
+class HealthChecker:
+    """Per process cache of the last report, refreshed by one caller at a time"""
+
+    def __init__(self) -> None:
+        self._report: HealthReport | None = None
+        self._checked_at = 0.0
+        self._lock: asyncio.Lock | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def _get_lock(self) -> asyncio.Lock:
+        # asyncio locks are bound to the event loop they first wait on
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._loop is not loop:
+            self._lock = asyncio.Lock()
+            self._loop = loop
+        return self._lock
+
+    def _fresh(self) -> HealthReport | None:
+        age = time.monotonic() - self._checked_at
+        if self._report and age < settings.HEALTH_CHECK_CACHE_SECONDS:
+            return self._report
+        return None
+
+    async def check(self) -> HealthReport:
+        if report := self._fresh():
+            return report
+        async with self._get_lock():
+            # Another caller may have refreshed it while this one waited
+            if report := self._fresh():
+                return report
+            self._report = await check_dependencies()
+            self._checked_at = time.monotonic()
+            return self._report
+
+    def clear(self) -> None:
+        self._report = None
+        self._checked_at = 0.0
+
+
+health_checker = HealthChecker()
@@ -0,0 +1,39 @@
+"""
+Shared outbound HTTP client
+
+One httpx.AsyncClient per process keeps connections to third party APIs
+alive between requests, and negotiates HTTP/2 where the server offers it, so
+a call only pays for DNS, TCP and TLS setup once. The application lifespan
+opens it at startup and closes it on shutdown.
+"""
+
+import httpx
+
+from app.core.config import settings
+
+_client: httpx.AsyncClient | None = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(
+                max_connections=settings.HTTP_CLIENT_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.HTTP_CLIENT_MAX_KEEPALIVE,
+                keepalive_expiry=settings.HTTP_CLIENT_KEEPALIVE_EXPIRY,
+            ),
+            timeout=httpx.Timeout(
+                settings.HTTP_CLIENT_TIMEOUT,
+                connect=settings.HTTP_CLIENT_CONNECT_TIMEOUT,
+            ),
+        )
+    return _client
+
+
+async def close() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
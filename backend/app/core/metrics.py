@@ -0,0 +1,264 @@
+"""
+Prometheus metrics
+
+Served at /metrics. With `fastapi run --workers 4` every worker is a separate
+process, so when PROMETHEUS_MULTIPROC_DIR is set each process writes its
+values to memory mapped files in that directory and a scrape aggregates the
+files of all workers. The directory has to be emptied before the workers
+start, the Docker image does it in its start command.
+
+Every metric has labels: a labelled metric only creates its files on first
+use, so importing this module in a process that records nothing leaves the
+directory untouched.
+"""
+
+import logging
+import os
+import re
+import secrets
+import time
+from typing import Any
+
+import redis
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.registry import Collector
+from sqlalchemy import Engine, event
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.celery_app import celery_app
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+MULTIPROC_DIR = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+if MULTIPROC_DIR:
+    os.makedirs(MULTIPROC_DIR, exist_ok=True)
+
+# Database and Redis calls are mostly well under a millisecond
+FAST_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+)
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency, by route operation id",
+    ["method", "route", "status"],
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "HTTP requests being served",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+DB_QUERY_DURATION = Histogram(
+    "db_query_duration_seconds",
+    "SQL statement execution time",
+    ["engine", "operation"],
+    buckets=FAST_BUCKETS,
+)
+# Pool gauges are set by each process after every checkout and return,
+# livesum adds up the pools of all live workers
+DB_POOL_SIZE = Gauge(
+    "db_pool_size",
+    "Connections the pool keeps open",
+    ["engine"],
+    multiprocess_mode="livesum",
+)
+DB_POOL_IN_USE = Gauge(
+    "db_pool_connections_in_use",
+    "Pooled connections checked out",
+    ["engine"],
+    multiprocess_mode="livesum",
+)
+DB_POOL_OVERFLOW = Gauge(
+    "db_pool_overflow",
+    "Connections open beyond the pool size",
+    ["engine"],
+    multiprocess_mode="livesum",
+)
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled connection",
+    ["engine"],
+    buckets=FAST_BUCKETS,
+)
+REDIS_COMMAND_DURATION = Histogram(
+    "redis_command_duration_seconds",
+    "Redis command latency, including the wait for a pooled connection",
+    ["command"],
+    buckets=FAST_BUCKETS,
+)
+HEALTH_PROBE_DURATION = Histogram(
+    "health_probe_duration_seconds",
+    "Dependency health probe latency",
+    ["dependency", "status"],
+    buckets=FAST_BUCKETS,
+)
+CELERY_TASK_DURATION = Histogram(
+    "celery_task_duration_seconds",
+    "Celery task run time in the worker",
+    ["task", "state"],
+)
+
+# Anything else is reported as OTHER, to bound the label values
+SQL_OPERATIONS = {"SELECT", "INSERT", "UPDATE", "DELETE", "WITH"}
+_SQL_OPERATION = re.compile(r"\s*(\w+)")
+
+
+class PrometheusMiddleware:
+    """
+    Times every HTTP request. The route label is the operation id given by
+    custom_generate_unique_id, unmatched paths are grouped so that scanners
+    can't create a series per URL.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] == "/metrics":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        in_progress = HTTP_REQUESTS_IN_PROGRESS.labels(method=method)
+        in_progress.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            in_progress.dec()
+            # The router stores the matched route in the scope
+            route = getattr(scope.get("route"), "unique_id", "unmatched")
+            HTTP_REQUEST_DURATION.labels(
+                method=method, route=route, status=str(status)
+            ).observe(time.perf_counter() - started)
+
+
+def instrument_engine(engine: Engine, name: str) -> None:
+    """Time every statement run on `engine`, pass `sync_engine` of async ones"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn: Any, *_args: Any) -> None:
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(
+        conn: Any, _cursor: Any, statement: str, *_args: Any
+    ) -> None:
+        started = conn.info["query_started"].pop()
+        match = _SQL_OPERATION.match(statement)
+        operation = match.group(1).upper() if match else ""
+        DB_QUERY_DURATION.labels(
+            engine=name,
+            operation=operation if operation in SQL_OPERATIONS else "OTHER",
+        ).observe(time.perf_counter() - started)
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(context: Any) -> None:
+        if context.connection is not None:
+            started = context.connection.info.get("query_started")
+            if started:
+                started.pop()
+
+
+class CeleryQueueCollector(Collector):
+    """Length of the Celery queues, read from the Redis broker at scrape time"""
+
+    def __init__(self) -> None:
+        self._client: redis.Redis | None = None
+
+    def queues(self) -> list[str]:
+        routes = celery_app.conf.task_routes or {}
+        return sorted(
+            {celery_app.conf.task_default_queue}
+            | {route["queue"] for route in routes.values()}
+        )
+
+    def collect(self) -> Any:
+        if not settings.CELERY_BROKER_URL.startswith("redis"):
+            return
+        if self._client is None:
+            self._client = redis.Redis.from_url(
+                settings.CELERY_BROKER_URL, socket_timeout=1, socket_connect_timeout=1
+            )
+        queues = self.queues()
+        try:
+            pipe = self._client.pipeline(transaction=False)
+            for queue in queues:
+                pipe.llen(queue)
+            lengths = pipe.execute()
+        except redis.RedisError as e:
+            logger.warning(f"Celery queue length unavailable: {e}")
+            return
+        family = GaugeMetricFamily(
+            "celery_queue_length",
+            "Messages waiting in a Celery queue",
+            labels=["queue"],
+        )
+        for queue, length in zip(queues, lengths, strict=True):
+            family.add_metric([queue], length)
+        yield family
+
+
+celery_queue_collector = CeleryQueueCollector()
+if not MULTIPROC_DIR:
+    REGISTRY.register(celery_queue_collector)
+
+
+def get_registry() -> CollectorRegistry:
+    """Registry to expose, aggregating all processes in multiprocess mode"""
+    if not MULTIPROC_DIR:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)  # type: ignore[no-untyped-call]
+    registry.register(celery_queue_collector)
+    return registry
+
+
+def mark_process_dead() -> None:
+    """Drop the live gauges of this process, call it when the process exits"""
+    if MULTIPROC_DIR:
+        multiprocess.mark_process_dead(os.getpid())  # type: ignore[no-untyped-call]
+
+
+async def metrics_endpoint(request: Request) -> Response:
+    if settings.METRICS_TOKEN:
+        authorization = request.headers.get("Authorization", "")
+        expected = f"Bearer {settings.METRICS_TOKEN}"
+        if not secrets.compare_digest(authorization.encode(), expected.encode()):
+            return Response(status_code=401)
+    # Reads the files of every process and asks the broker for queue lengths
+    data = await run_in_threadpool(generate_latest, get_registry())
+    return Response(data, media_type=CONTENT_TYPE_LATEST)
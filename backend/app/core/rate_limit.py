@@ -0,0 +1,139 @@
+"""
+Rate limiting backed by Redis
+
+Two algorithms, each a single Lua script so that checking and recording a hit
+is one atomic round trip shared by all workers:
+
+- token bucket: `limit` tokens refilled evenly over `period`, allows bursts
+- sliding window log: at most `limit` hits in any `period` long window
+
+Both measure time with the Redis server clock. If Redis is unreachable the
+limits are enforced per process instead, which is looser but never fails open
+completely.
+"""
+
+import logging
+import math
+import secrets
+import threading
+import time
+from typing import Literal
+
+import redis
+
+from app.core.cache import TTLCache
+from app.core.redis_client import Script
+
+logger = logging.getLogger(__name__)
+
+Algorithm = Literal["token_bucket", "sliding_window"]
+
+# Redis key 前缀
+RATE_LIMIT_PREFIX = "rate:"
+
+# KEYS: bucket key  ARGV: 容量, 填满所需毫秒数
+# 返回需要等待的毫秒数, 0 表示放行
+token_bucket_script = Script(
+    """
+local now = redis.call('TIME')
+now = tonumber(now[1]) * 1000 + math.floor(tonumber(now[2]) / 1000)
+local capacity = tonumber(ARGV[1])
+local period = tonumber(ARGV[2])
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + (now - ts) * capacity / period)
+local retry_after = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    retry_after = math.ceil((1 - tokens) * period / capacity)
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', now)
+redis.call('PEXPIRE', KEYS[1], period)
+return retry_after
+"""
+)
+
+# KEYS: window key  ARGV: 次数上限, 窗口毫秒数, 本次请求的唯一成员
+# 返回需要等待的毫秒数, 0 表示放行
+sliding_window_script = Script(
+    """
+local now = redis.call('TIME')
+now = tonumber(now[1]) * 1000 + math.floor(tonumber(now[2]) / 1000)
+local limit = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - window)
+if redis.call('ZCARD', KEYS[1]) < limit then
+    redis.call('ZADD', KEYS[1], now, ARGV[3])
+    redis.call('PEXPIRE', KEYS[1], window)
+    return 0
+end
+local oldest = redis.call('ZRANGE', KEYS[1], 0, 0, 'WITHSCORES')
+return math.max(1, tonumber(oldest[2]) + window - now)
+"""
+)
+
+
+class LocalRateLimiter:
+    """In-process equivalent of the scripts, used while Redis is unavailable"""
+
+    def __init__(self, maxsize: int = 10_000) -> None:
+        self._buckets: TTLCache[str, tuple[float, float]] = TTLCache(maxsize, ttl=0)
+        self._windows: TTLCache[str, list[float]] = TTLCache(maxsize, ttl=0)
+        self._lock = threading.Lock()
+
+    def token_bucket(self, key: str, limit: int, period_ms: int) -> int:
+        now = time.monotonic() * 1000
+        with self._lock:
+            tokens, ts = self._buckets.get(key) or (float(limit), now)
+            tokens = min(limit, tokens + (now - ts) * limit / period_ms)
+            retry_after = 0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                retry_after = math.ceil((1 - tokens) * period_ms / limit)
+            self._buckets.set(key, (tokens, now), ttl=period_ms / 1000)
+        return retry_after
+
+    def sliding_window(self, key: str, limit: int, period_ms: int) -> int:
+        now = time.monotonic() * 1000
+        with self._lock:
+            hits = [t for t in self._windows.get(key) or [] if t > now - period_ms]
+            retry_after = 0
+            if len(hits) < limit:
+                hits.append(now)
+            else:
+                retry_after = max(1, math.ceil(hits[0] + period_ms - now))
+            self._windows.set(key, hits, ttl=period_ms / 1000)
+        return retry_after
+
+
+local_limiter = LocalRateLimiter()
+
+
+async def hit(key: str, limit: int, period: float, algorithm: Algorithm) -> float:
+    """
+    Record one hit for key.
+
+    Returns 0 when the hit is allowed, otherwise the seconds to wait before
+    the next one would be.
+    """
+    period_ms = math.ceil(period * 1000)
+    redis_key = f"{RATE_LIMIT_PREFIX}{algorithm}:{key}"
+    try:
+        if algorithm == "token_bucket":
+            retry_after = await token_bucket_script(
+                keys=[redis_key], args=[limit, period_ms]
+            )
+        else:
+            retry_after = await sliding_window_script(
+                keys=[redis_key], args=[limit, period_ms, secrets.token_hex(8)]
+            )
+    except redis.RedisError as e:
+        logger.warning(f"Rate limiter falling back to in-process state: {e}")
+        if algorithm == "token_bucket":
+            retry_after = local_limiter.token_bucket(redis_key, limit, period_ms)
+        else:
+            retry_after = local_limiter.sliding_window(redis_key, limit, period_ms)
+    return int(retry_after) / 1000
@@ -0,0 +1,77 @@
+"""
+Shared asyncio Redis client
+
+One blocking connection pool per process, used by every coroutine that talks
+to Redis. Connections are bound to the event loop that opened them, the
+application lifespan closes the pool on shutdown.
+"""
+
+import hashlib
+import time
+from collections.abc import Sequence
+from typing import Any
+
+import redis.asyncio as aioredis
+from redis.exceptions import NoScriptError
+
+from app.core.config import settings
+from app.core.metrics import REDIS_COMMAND_DURATION
+
+
+class InstrumentedRedis(aioredis.Redis):
+    """Records the latency of every command, pipelines are not timed"""
+
+    async def execute_command(self, *args: Any, **options: Any) -> Any:
+        started = time.perf_counter()
+        try:
+            return await super().execute_command(*args, **options)  # type: ignore[no-untyped-call]
+        finally:
+            REDIS_COMMAND_DURATION.labels(command=str(args[0]).upper()).observe(
+                time.perf_counter() - started
+            )
+
+
+_client: aioredis.Redis | None = None
+
+
+def get_redis() -> aioredis.Redis:
+    global _client
+    if _client is None:
+        # Waits for a free connection instead of failing once the pool is full
+        pool = aioredis.BlockingConnectionPool.from_url(
+            settings.REDIS_URL,
+            decode_responses=True,
+            max_connections=settings.REDIS_MAX_CONNECTIONS,
+            timeout=settings.REDIS_POOL_TIMEOUT,
+        )
+        _client = InstrumentedRedis(connection_pool=pool)
+    return _client
+
+
+async def close() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        await _client.connection_pool.disconnect()
+        _client = None
+
+
+class Script:
+    """
+    Lua script run with EVALSHA on the shared client.
+
+    The SHA1 is computed once, the source is only sent again when the server
+    does not know the script yet (first call, restart or SCRIPT FLUSH).
+    """
+
+    def __init__(self, source: str) -> None:
+        self.source = source
+        self.sha = hashlib.sha1(source.encode()).hexdigest()
+
+    async def __call__(self, keys: Sequence[str], args: Sequence[Any]) -> Any:
+        client = get_redis()
+        try:
+            return await client.evalsha(self.sha, len(keys), *keys, *args)  # type: ignore[misc]
+        except NoScriptError:
+            await client.script_load(self.source)
+            return await client.evalsha(self.sha, len(keys), *keys, *args)  # type: ignore[misc]
@@ -1,16 +1,47 @@
+import asyncio
+import hashlib
+import logging
+import multiprocessing
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime, timedelta, timezone
-from typing import Any
+from typing import Any, TypeVar
 
+import anyio
 import jwt
 from passlib.context import CryptContext
 
+from app.core.cache import TTLCache
 from app.core.config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+logger = logging.getLogger(__name__)
+
+# Both schemes verify, only the configured one hashes; everything else
+# (including the configured scheme at another cost) reports needs_update
+pwd_context = CryptContext(
+    schemes=list(
+        dict.fromkeys([settings.PASSWORD_HASH_SCHEME or "bcrypt", "argon2", "bcrypt"])
+    ),
+    deprecated="auto",
+    bcrypt__rounds=settings.PASSWORD_BCRYPT_ROUNDS,
+    argon2__time_cost=settings.PASSWORD_ARGON2_TIME_COST,
+    argon2__memory_cost=settings.PASSWORD_ARGON2_MEMORY_COST,
+    argon2__parallelism=settings.PASSWORD_ARGON2_PARALLELISM,
+)
 
 
 ALGORITHM = "HS256"
 
+T = TypeVar("T")
+
+# Verified access token payloads by token digest, each kept until its exp
+token_cache: TTLCache[bytes, dict[str, Any]] = TTLCache(
+    maxsize=settings.TOKEN_CACHE_SIZE, ttl=0
+)
+
 
 def create_access_token(subject: str | Any, expires_delta: timedelta) -> str:
     expire = datetime.now(timezone.utc) + expires_delta
@@ -19,9 +50,121 @@ def create_access_token(subject: str | Any, expires_delta: timedelta) -> str:
     return encoded_jwt
 
 
+def decode_access_token(token: str) -> dict[str, Any]:
+    """
+    Verify the token signature and return its payload.
+
+    Clients reuse the same token for days, a verified payload is memoized
+    so that repeated requests skip the HMAC check and JSON parsing. Raises
+    jwt.InvalidTokenError like jwt.decode.
+    """
+    key = hashlib.sha256(token.encode()).digest()
+    payload = token_cache.get(key)
+    if payload is not None:
+        return payload
+    payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[ALGORITHM])
+    exp = payload.get("exp")
+    if isinstance(exp, int | float) and (ttl := exp - time.time()) > 0:
+        token_cache.set(key, payload, ttl=ttl)
+    return payload
+
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
+
+
+def verify_and_update_password(
+    plain_password: str, hashed_password: str
+) -> tuple[bool, str | None]:
+    """Verify the password, plus a new hash when the stored one is outdated"""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+class PasswordHasherBusyError(Exception):
+    """Too many password hashes are already waiting for a hashing process"""
+
+    pass
+
+
+# bcrypt is CPU bound, the async code paths hash in a dedicated process pool
+# so that a login storm cannot pin the request workers' CPU. Hashes that
+# would wait behind PASSWORD_HASH_MAX_PENDING others are refused instead.
+_hash_executor: ProcessPoolExecutor | None = None
+_hash_pending = 0
+_hash_lock = threading.Lock()
+
+
+def _get_hash_executor() -> ProcessPoolExecutor:
+    global _hash_executor
+    if _hash_executor is None:
+        _hash_executor = ProcessPoolExecutor(
+            max_workers=settings.PASSWORD_HASH_WORKERS,
+            # Request workers run threads and an event loop, do not fork them
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _hash_executor
+
+
+def _replace_hash_executor(broken: ProcessPoolExecutor | None) -> None:
+    global _hash_executor
+    with _hash_lock:
+        # Concurrent hashes fail together, only the first one replaces the pool
+        if broken is None or _hash_executor is not broken:
+            return
+        _hash_executor = None
+    broken.shutdown(wait=False, cancel_futures=True)
+
+
+async def _run_hasher(func: Callable[..., T], *args: Any) -> T:
+    global _hash_pending
+    if settings.PASSWORD_HASH_WORKERS <= 0:
+        return await anyio.to_thread.run_sync(func, *args)
+    with _hash_lock:
+        if _hash_pending >= settings.PASSWORD_HASH_MAX_PENDING:
+            raise PasswordHasherBusyError()
+        _hash_pending += 1
+    try:
+        loop = asyncio.get_running_loop()
+        executor = _get_hash_executor()
+        try:
+            return await loop.run_in_executor(executor, func, *args)
+        except BrokenProcessPool:
+            # A hashing process died (OOM killer, crash) and the pool refuses
+            # all further work, start a new one and retry this hash once
+            logger.warning("Password hasher pool is broken, restarting it")
+            _replace_hash_executor(executor)
+        try:
+            return await loop.run_in_executor(_get_hash_executor(), func, *args)
+        except BrokenProcessPool:
+            _replace_hash_executor(_hash_executor)
+            raise PasswordHasherBusyError()
+    finally:
+        with _hash_lock:
+            _hash_pending -= 1
+
+
+def shutdown_password_hasher() -> None:
+    global _hash_executor
+    if _hash_executor is not None:
+        _hash_executor.shutdown(wait=False, cancel_futures=True)
+        _hash_executor = None
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _run_hasher(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    return await _run_hasher(get_password_hash, password)
+
+
+async def verify_and_update_password_async(
+    plain_password: str, hashed_password: str
+) -> tuple[bool, str | None]:
+    return await _run_hasher(
+        verify_and_update_password, plain_password, hashed_password
+    )
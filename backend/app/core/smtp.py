@@ -0,0 +1,90 @@
+"""
+SMTP connection pool
+
+Opening an SMTP connection costs a TCP connect, the STARTTLS handshake and
+the AUTH exchange, which dwarfs the time to transfer one message. Each process
+(API worker or Celery worker child) keeps up to SMTP_POOL_SIZE authenticated
+connections open between sends. Connections idle for longer than
+SMTP_POOL_MAX_IDLE_SECONDS are dropped before the server times them out, and
+a connection the server closed anyway is reopened once by the backend.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Any
+
+from emails.backend.smtp import SMTPBackend  # type: ignore
+
+from app.core.config import settings
+
+
+def smtp_options() -> dict[str, Any]:
+    options: dict[str, Any] = {"host": settings.SMTP_HOST, "port": settings.SMTP_PORT}
+    if settings.SMTP_TLS:
+        options["tls"] = True
+    elif settings.SMTP_SSL:
+        options["ssl"] = True
+    if settings.SMTP_USER:
+        options["user"] = settings.SMTP_USER
+    if settings.SMTP_PASSWORD:
+        options["password"] = settings.SMTP_PASSWORD
+    return options
+
+
+class SMTPPool:
+    """Thread safe pool of SMTP backends, each used by one sender at a time"""
+
+    def __init__(self, size: int, max_idle: float) -> None:
+        self.size = size
+        self.max_idle = max_idle
+        self._idle: deque[tuple[float, SMTPBackend]] = deque()
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    def _acquire(self) -> SMTPBackend:
+        with self._lock:
+            if self._pid != os.getpid():
+                # Forked child, the sockets belong to the parent process
+                self._idle.clear()
+                self._pid = os.getpid()
+            while self._idle:
+                # Most recently used first, it is the least likely to be stale
+                released_at, backend = self._idle.pop()
+                if time.monotonic() - released_at <= self.max_idle:
+                    return backend
+                backend.close()
+        return SMTPBackend(**smtp_options())
+
+    def _release(self, backend: SMTPBackend) -> None:
+        with self._lock:
+            if len(self._idle) < self.size and self._pid == os.getpid():
+                self._idle.append((time.monotonic(), backend))
+                return
+        backend.close()
+
+    @contextmanager
+    def connection(self) -> Iterator[SMTPBackend]:
+        """Borrow a backend, the connection is opened on its first message"""
+        backend = self._acquire()
+        try:
+            yield backend
+        except BaseException:
+            backend.close()
+            raise
+        self._release(backend)
+
+    def close(self) -> None:
+        with self._lock:
+            idle = list(self._idle)
+            self._idle.clear()
+        for _, backend in idle:
+            backend.close()
+
+
+smtp_pool = SMTPPool(
+    size=settings.SMTP_POOL_SIZE, max_idle=settings.SMTP_POOL_MAX_IDLE_SECONDS
+)
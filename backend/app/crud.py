@@ -1,12 +1,55 @@
 import uuid
-from typing import Any
+from collections.abc import Sequence
+from typing import Any, TypeVar
 
-from sqlmodel import Session, select
+from sqlalchemy import (
+    ARRAY,
+    Boolean,
+    ColumnElement,
+    Executable,
+    Table,
+    Uuid,
+    any_,
+    case,
+    column,
+    delete,
+    exists,
+    false,
+    insert,
+    literal,
+    or_,
+    table,
+    true,
+    union_all,
+    update,
+    values,
+)
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlmodel import Session, col, func, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.core.security import get_password_hash, verify_password
-from app.models import Item, ItemCreate, User, UserCreate, UserUpdate
+from app.core.cache import invalidate_user, invalidate_user_async
+from app.core.security import (
+    get_password_hash,
+    get_password_hash_async,
+    verify_and_update_password,
+    verify_and_update_password_async,
+)
+from app.models import (
+    Item,
+    ItemBulkUpdate,
+    ItemCreate,
+    ItemUpdate,
+    User,
+    UserCreate,
+    UserUpdate,
+)
 from app.services.wechat import WechatUserInfo
 
+PageModelT = TypeVar("PageModelT", Item, User)
+
+pg_class = table("pg_class", column("oid"), column("reltuples"))
+
 
 def create_user(*, session: Session, user_create: UserCreate) -> User:
     db_obj = User.model_validate(
@@ -14,7 +57,6 @@ def create_user(*, session: Session, user_create: UserCreate) -> User:
     )
     session.add(db_obj)
     session.commit()
-    session.refresh(db_obj)
     return db_obj
 
 
@@ -28,7 +70,7 @@ def update_user(*, session: Session, db_user: User, user_in: UserUpdate) -> Any:
     db_user.sqlmodel_update(user_data, update=extra_data)
     session.add(db_user)
     session.commit()
-    session.refresh(db_user)
+    invalidate_user(db_user.id)
     return db_user
 
 
@@ -40,10 +82,16 @@ def get_user_by_email(*, session: Session, email: str) -> User | None:
 
 def authenticate(*, session: Session, email: str, password: str) -> User | None:
     db_user = get_user_by_email(session=session, email=email)
-    if not db_user:
+    if not db_user or not db_user.hashed_password:
         return None
-    if not verify_password(password, db_user.hashed_password):
+    verified, new_hash = verify_and_update_password(password, db_user.hashed_password)
+    if not verified:
         return None
+    if new_hash:
+        # Stored with an outdated scheme or cost, upgrade it transparently
+        db_user.hashed_password = new_hash
+        session.add(db_user)
+        session.commit()
     return db_user
 
 
@@ -51,10 +99,45 @@ def create_item(*, session: Session, item_in: ItemCreate, owner_id: uuid.UUID) -
     db_item = Item.model_validate(item_in, update={"owner_id": owner_id})
     session.add(db_item)
     session.commit()
-    session.refresh(db_item)
     return db_item
 
 
+def delete_user_items_batch(
+    *,
+    session: Session,
+    owner_id: uuid.UUID,
+    batch_size: int,
+    after_id: uuid.UUID | None = None,
+    skip_locked: bool = False,
+) -> Sequence[uuid.UUID]:
+    """
+    Delete the next `batch_size` items of a user in id order, in a
+    transaction of their own, and return their ids.
+
+    Pass the last returned id as `after_id` for the next batch, so batches
+    don't rescan the index entries of the rows already deleted. Fewer than
+    `batch_size` ids means the user has no items left, unless `skip_locked`
+    left out rows locked by another transaction.
+    """
+    batch = select(Item.id).where(col(Item.owner_id) == owner_id)
+    if after_id is not None:
+        batch = batch.where(col(Item.id) > after_id)
+    batch = batch.order_by(col(Item.id)).limit(batch_size)
+    if skip_locked:
+        batch = batch.with_for_update(skip_locked=True)
+    # id = ANY(ARRAY(...)) keeps the delete on primary key lookups, a join
+    # with the batch may be planned as a scan of the whole table
+    statement = (
+        delete(Item)
+        .where(col(Item.id) == any_(func.array(batch.scalar_subquery())))
+        .returning(col(Item.id))
+    )
+    result = session.exec(statement)  # type: ignore[call-overload]
+    deleted: Sequence[uuid.UUID] = result.scalars().all()
+    session.commit()
+    return deleted
+
+
 # Phone-related CRUD functions
 def get_user_by_phone(*, session: Session, phone: str) -> User | None:
     """通过手机号查找用户"""
@@ -74,23 +157,10 @@ def create_user_by_phone(
     )
     session.add(db_obj)
     session.commit()
-    session.refresh(db_obj)
     return db_obj
 
 
 # WeChat-related CRUD functions
-def get_user_by_wechat_openid(*, session: Session, openid: str) -> User | None:
-    """通过微信 OpenID 查找用户"""
-    statement = select(User).where(User.wechat_openid == openid)
-    return session.exec(statement).first()
-
-
-def get_user_by_wechat_unionid(*, session: Session, unionid: str) -> User | None:
-    """通过微信 UnionID 查找用户"""
-    statement = select(User).where(User.wechat_unionid == unionid)
-    return session.exec(statement).first()
-
-
 def create_user_by_wechat(*, session: Session, wechat_info: WechatUserInfo) -> User:
     """通过微信信息创建用户"""
     db_obj = User(
@@ -102,25 +172,92 @@ def create_user_by_wechat(*, session: Session, wechat_info: WechatUserInfo) -> U
     )
     session.add(db_obj)
     session.commit()
-    session.refresh(db_obj)
     return db_obj
 
 
-def update_user_wechat_info(
-    *, session: Session, db_user: User, wechat_info: WechatUserInfo
-) -> User:
-    """更新用户的微信信息"""
-    db_user.wechat_openid = wechat_info.openid
+def _upsert_user_by_wechat_statement(wechat_info: WechatUserInfo) -> Executable:
+    """
+    在一条语句中按 UnionID 或 OpenID 查找用户, 存在则更新微信信息, 否则创建
+
+    昵称和头像只在用户未设置时填充, 信息未变化时不写入. 并发的首次登录
+    由 wechat_openid 的唯一约束和 ON CONFLICT 处理. 结果为 User 和表示是否
+    写入的 written.
+    """
+    user: Table = User.__table__  # type: ignore[attr-defined]
+    match: ColumnElement[bool] = user.c.wechat_openid == wechat_info.openid
+    # 与原来的查找顺序一致, UnionID 匹配优先
+    priority: ColumnElement[int] = literal(0)
     if wechat_info.unionid:
-        db_user.wechat_unionid = wechat_info.unionid
-    if wechat_info.nickname and not db_user.nickname:
-        db_user.nickname = wechat_info.nickname
-    if wechat_info.avatar and not db_user.avatar:
-        db_user.avatar = wechat_info.avatar
-    session.add(db_user)
+        match = or_(user.c.wechat_unionid == wechat_info.unionid, match)
+        priority = case((user.c.wechat_unionid == wechat_info.unionid, 0), else_=1)
+    existing = (
+        select(user.c.id).where(match).order_by(priority).limit(1).cte("existing")
+    )
+
+    values: dict[str, Any] = {"wechat_openid": wechat_info.openid}
+    if wechat_info.unionid:
+        values["wechat_unionid"] = wechat_info.unionid
+    if wechat_info.nickname:
+        values["nickname"] = func.coalesce(
+            func.nullif(user.c.nickname, ""), wechat_info.nickname
+        )
+    if wechat_info.avatar:
+        values["avatar"] = func.coalesce(
+            func.nullif(user.c.avatar, ""), wechat_info.avatar
+        )
+    changed = or_(
+        *(user.c[name].is_distinct_from(value) for name, value in values.items())
+    )
+
+    updated = (
+        update(user)
+        .where(user.c.id == existing.c.id, changed)
+        .values(values)
+        .returning(*user.c, true().label("written"))
+        .cte("updated")
+    )
+    new_user = User(
+        wechat_openid=wechat_info.openid,
+        wechat_unionid=wechat_info.unionid,
+        nickname=wechat_info.nickname,
+        avatar=wechat_info.avatar,
+        hashed_password="",  # 微信登录不需要密码
+    ).model_dump()
+    inserted = (
+        pg_insert(user)
+        .from_select(
+            list(user.c.keys()),
+            select(
+                *(literal(new_user[c.name], type_=c.type).label(c.name) for c in user.c)
+            ).where(~exists(existing.select())),
+        )
+        .on_conflict_do_update(index_elements=[user.c.wechat_openid], set_=values)
+        .returning(*user.c, true().label("written"))
+        .cte("inserted")
+    )
+    unchanged = (
+        user.select()
+        .add_columns(false().label("written"))
+        .where(user.c.id == existing.c.id, ~exists(updated.select()))
+    )
+    statement = union_all(updated.select(), inserted.select(), unchanged)
+    return (
+        select(User, column("written"))
+        .from_statement(statement)
+        .execution_options(populate_existing=True)
+    )
+
+
+def upsert_user_by_wechat(*, session: Session, wechat_info: WechatUserInfo) -> User:
+    """通过微信信息查找并更新, 或创建用户, 只需一次数据库往返"""
+    statement = _upsert_user_by_wechat_statement(wechat_info)
+    row = session.exec(statement).one()  # type: ignore[call-overload]
+    user: User = row.User
+    written: bool = row.written
     session.commit()
-    session.refresh(db_user)
-    return db_user
+    if written:
+        invalidate_user(user.id)
+    return user
 
 
 def bind_phone_to_user(*, session: Session, db_user: User, phone: str) -> User:
@@ -129,5 +266,288 @@ def bind_phone_to_user(*, session: Session, db_user: User, phone: str) -> User:
     db_user.is_phone_verified = True
     session.add(db_user)
     session.commit()
-    session.refresh(db_user)
+    invalidate_user(db_user.id)
+    return db_user
+
+
+# Async counterparts, used by the API routes through AsyncSessionDep
+async def create_user_async(*, session: AsyncSession, user_create: UserCreate) -> User:
+    db_obj = User.model_validate(
+        user_create,
+        update={"hashed_password": await get_password_hash_async(user_create.password)},
+    )
+    session.add(db_obj)
+    await session.commit()
+    return db_obj
+
+
+async def update_user_async(
+    *, session: AsyncSession, db_user: User, user_in: UserUpdate
+) -> Any:
+    user_data = user_in.model_dump(exclude_unset=True)
+    extra_data = {}
+    if "password" in user_data:
+        password = user_data["password"]
+        hashed_password = await get_password_hash_async(password)
+        extra_data["hashed_password"] = hashed_password
+    db_user.sqlmodel_update(user_data, update=extra_data)
+    session.add(db_user)
+    await session.commit()
+    await invalidate_user_async(db_user.id)
+    return db_user
+
+
+async def get_user_by_email_async(*, session: AsyncSession, email: str) -> User | None:
+    statement = select(User).where(User.email == email)
+    result = await session.exec(statement)
+    return result.first()
+
+
+async def authenticate_async(
+    *, session: AsyncSession, email: str, password: str
+) -> User | None:
+    db_user = await get_user_by_email_async(session=session, email=email)
+    if not db_user or not db_user.hashed_password:
+        return None
+    verified, new_hash = await verify_and_update_password_async(
+        password, db_user.hashed_password
+    )
+    if not verified:
+        return None
+    if new_hash:
+        # Stored with an outdated scheme or cost, upgrade it transparently
+        db_user.hashed_password = new_hash
+        session.add(db_user)
+        await session.commit()
     return db_user
+
+
+async def create_item_async(
+    *, session: AsyncSession, item_in: ItemCreate, owner_id: uuid.UUID
+) -> Item:
+    db_item = Item.model_validate(item_in, update={"owner_id": owner_id})
+    session.add(db_item)
+    await session.commit()
+    return db_item
+
+
+async def create_items_async(
+    *, session: AsyncSession, items_in: Sequence[ItemCreate], owner_id: uuid.UUID
+) -> Sequence[Item]:
+    """
+    Insert items with multi-row INSERT ... RETURNING, in request order.
+    """
+    rows = [
+        Item.model_validate(item_in, update={"owner_id": owner_id}).model_dump()
+        for item_in in items_in
+    ]
+    statement = insert(Item).returning(Item, sort_by_parameter_order=True)
+    items = (await session.scalars(statement, rows)).all()
+    await session.commit()
+    return items
+
+
+async def update_items_async(
+    *,
+    session: AsyncSession,
+    items_in: Sequence[ItemBulkUpdate],
+    owner_id: uuid.UUID | None = None,
+) -> Sequence[Item]:
+    """
+    Apply partial updates with a single UPDATE ... FROM (VALUES ...).
+
+    Each row carries a flag per field telling whether it was set, so fields
+    left out of a row keep their value. Rows whose item does not exist, or
+    is not owned by `owner_id` when given, are skipped; only the updated
+    items are returned. Ids must be unique.
+    """
+    item_table: Table = Item.__table__  # type: ignore[attr-defined]
+    fields = list(ItemUpdate.model_fields)
+    columns = [column("id", item_table.c.id.type)]
+    for name in fields:
+        columns.append(column(name, item_table.c[name].type))
+        columns.append(column(f"set_{name}", Boolean))
+    rows = []
+    for item_in in items_in:
+        data = item_in.model_dump(exclude_unset=True)
+        row: list[Any] = [item_in.id]
+        for name in fields:
+            row += [data.get(name), name in data]
+        rows.append(tuple(row))
+    new = values(*columns, name="new").data(rows)
+
+    statement = (
+        update(Item)
+        .where(col(Item.id) == new.c.id)
+        .values(
+            {
+                name: case(
+                    (new.c[f"set_{name}"], new.c[name]), else_=item_table.c[name]
+                )
+                for name in fields
+            }
+        )
+    )
+    if owner_id is not None:
+        statement = statement.where(col(Item.owner_id) == owner_id)
+    statement = statement.returning(Item).execution_options(
+        synchronize_session=False, populate_existing=True
+    )
+    items = (await session.scalars(statement)).all()
+    await session.commit()
+    return items
+
+
+async def delete_items_async(
+    *,
+    session: AsyncSession,
+    ids: Sequence[uuid.UUID],
+    owner_id: uuid.UUID | None = None,
+) -> Sequence[uuid.UUID]:
+    """
+    Delete items with DELETE ... WHERE id = ANY(:ids), returning deleted ids.
+
+    Items that do not exist, or are not owned by `owner_id` when given, are
+    skipped.
+    """
+    statement = delete(Item).where(
+        col(Item.id) == any_(literal(list(ids), ARRAY(Uuid)))
+    )
+    if owner_id is not None:
+        statement = statement.where(col(Item.owner_id) == owner_id)
+    result = await session.exec(  # type: ignore[call-overload]
+        statement.returning(col(Item.id)).execution_options(synchronize_session=False)
+    )
+    deleted: Sequence[uuid.UUID] = result.scalars().all()
+    await session.commit()
+    return deleted
+
+
+async def get_existing_item_ids_async(
+    *, session: AsyncSession, ids: Sequence[uuid.UUID]
+) -> set[uuid.UUID]:
+    """Which of `ids` exist, regardless of the owner"""
+    statement = select(Item.id).where(
+        col(Item.id) == any_(literal(list(ids), ARRAY(Uuid)))
+    )
+    return set((await session.exec(statement)).all())
+
+
+async def get_user_by_phone_async(*, session: AsyncSession, phone: str) -> User | None:
+    """通过手机号查找用户"""
+    statement = select(User).where(User.phone == phone)
+    result = await session.exec(statement)
+    return result.first()
+
+
+async def create_user_by_phone_async(
+    *, session: AsyncSession, phone: str, nickname: str | None = None
+) -> User:
+    """通过手机号创建用户"""
+    db_obj = User(
+        phone=phone,
+        nickname=nickname or f"用户{phone[-4:]}",
+        is_phone_verified=True,
+        hashed_password="",  # 手机号登录不需要密码
+    )
+    session.add(db_obj)
+    await session.commit()
+    return db_obj
+
+
+async def upsert_user_by_wechat_async(
+    *, session: AsyncSession, wechat_info: WechatUserInfo
+) -> User:
+    """通过微信信息查找并更新, 或创建用户, 只需一次数据库往返"""
+    statement = _upsert_user_by_wechat_statement(wechat_info)
+    result = await session.exec(statement)  # type: ignore[call-overload]
+    row = result.one()
+    user: User = row.User
+    written: bool = row.written
+    await session.commit()
+    if written:
+        await invalidate_user_async(user.id)
+    return user
+
+
+async def bind_phone_to_user_async(
+    *, session: AsyncSession, db_user: User, phone: str
+) -> User:
+    """绑定手机号到用户"""
+    db_user.phone = phone
+    db_user.is_phone_verified = True
+    session.add(db_user)
+    await session.commit()
+    await invalidate_user_async(db_user.id)
+    return db_user
+
+
+async def estimate_row_count_async(
+    *, session: AsyncSession, model: type[PageModelT]
+) -> int | None:
+    """
+    Row count of the whole table from the planner statistics, without a scan.
+
+    None when the table has not been analyzed yet.
+    """
+    statement = select(pg_class.c.reltuples).where(
+        pg_class.c.oid == func.to_regclass(f'"{model.__tablename__}"')
+    )
+    reltuples = (await session.exec(statement)).first()
+    if reltuples is None or reltuples < 0:
+        return None
+    return int(reltuples)
+
+
+async def read_page_async(
+    *,
+    session: AsyncSession,
+    model: type[PageModelT],
+    filters: Sequence[ColumnElement[bool]] = (),
+    skip: int = 0,
+    limit: int = 100,
+    after_id: uuid.UUID | None = None,
+    include_count: bool = True,
+    approximate_count: bool = False,
+) -> tuple[Sequence[PageModelT], int | None]:
+    """
+    One page of rows ordered by id and the number of rows matching `filters`.
+
+    The count rides along the page query as count(*) OVER (), a separate
+    COUNT is only issued when that is not possible (keyset or out of range
+    pages). approximate_count reads the planner estimate instead, which only
+    applies to unfiltered tables.
+    """
+    id_column = col(model.id)
+    count = None
+    if include_count and approximate_count and not filters:
+        count = await estimate_row_count_async(session=session, model=model)
+
+    data: Sequence[PageModelT]
+    if include_count and count is None and after_id is None:
+        window_statement = (
+            select(model, func.count().over())
+            .where(*filters)
+            .order_by(id_column)
+            .offset(skip)
+            .limit(limit)
+        )
+        rows = (await session.exec(window_statement)).all()
+        data = [row[0] for row in rows]
+        if rows:
+            count = rows[0][1]
+        elif skip == 0:
+            count = 0
+    else:
+        statement = select(model).where(*filters)
+        if after_id is not None:
+            statement = statement.where(id_column > after_id)
+        else:
+            statement = statement.offset(skip)
+        statement = statement.order_by(id_column).limit(limit)
+        data = (await session.exec(statement)).all()
+
+    if include_count and count is None:
+        count_statement = select(func.count()).select_from(model).where(*filters)
+        count = (await session.exec(count_statement)).one()
+    return data, count
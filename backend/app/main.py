@@ -1,10 +1,18 @@
+from collections.abc import AsyncGenerator
+from contextlib import asynccontextmanager
+
 import sentry_sdk
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from fastapi.routing import APIRoute
 from starlette.middleware.cors import CORSMiddleware
 
 from app.api.main import api_router
+from app.core import http_client, metrics, redis_client, security
 from app.core.config import settings
+from app.core.db import async_engine
+from app.core.smtp import smtp_pool
+from app.utils import load_email_templates
 
 
 def custom_generate_unique_id(route: APIRoute) -> str:
@@ -14,12 +22,40 @@ def custom_generate_unique_id(route: APIRoute) -> str:
 if settings.SENTRY_DSN and settings.ENVIRONMENT != "local":
     sentry_sdk.init(dsn=str(settings.SENTRY_DSN), enable_tracing=True)
 
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI) -> AsyncGenerator[None, None]:
+    load_email_templates()
+    http_client.get_http_client()
+    yield
+    # Pooled async connections are bound to this event loop
+    await async_engine.dispose()
+    await redis_client.close()
+    await http_client.close()
+    security.shutdown_password_hasher()
+    smtp_pool.close()
+    metrics.mark_process_dead()
+
+
 app = FastAPI(
     title=settings.PROJECT_NAME,
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
     generate_unique_id_function=custom_generate_unique_id,
+    lifespan=lifespan,
 )
 
+
+@app.exception_handler(security.PasswordHasherBusyError)
+async def password_hasher_busy_handler(
+    _request: Request, _exc: security.PasswordHasherBusyError
+) -> JSONResponse:
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Too many login attempts in progress, retry shortly"},
+        headers={"Retry-After": "1"},
+    )
+
+
 # Set all CORS enabled origins
 if settings.all_cors_origins:
     app.add_middleware(
@@ -30,4 +66,7 @@ if settings.all_cors_origins:
         allow_headers=["*"],
     )
 
+app.add_middleware(metrics.PrometheusMiddleware)
+
 app.include_router(api_router, prefix=settings.API_V1_STR)
+app.add_route("/metrics", metrics.metrics_endpoint, include_in_schema=False)
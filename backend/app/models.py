@@ -1,6 +1,9 @@
 import uuid
+from datetime import datetime
+from typing import Literal
 
-from pydantic import EmailStr
+from pydantic import EmailStr, field_validator
+from sqlalchemy import DateTime, Index, text
 from sqlmodel import Field, Relationship, SQLModel
 
 
@@ -9,7 +12,8 @@ class UserBase(SQLModel):
     email: EmailStr | None = Field(
         default=None, unique=True, index=True, max_length=255
     )
-    phone: str | None = Field(default=None, unique=True, index=True, max_length=20)
+    # Partial unique index, see User.__table_args__
+    phone: str | None = Field(default=None, max_length=20)
     is_active: bool = True
     is_superuser: bool = False
     full_name: str | None = Field(default=None, max_length=255)
@@ -18,7 +22,8 @@ class UserBase(SQLModel):
     wechat_openid: str | None = Field(
         default=None, unique=True, index=True, max_length=100
     )
-    wechat_unionid: str | None = Field(default=None, index=True, max_length=100)
+    # Partial index, see User.__table_args__
+    wechat_unionid: str | None = Field(default=None, max_length=100)
     is_phone_verified: bool = False
 
 
@@ -51,8 +56,35 @@ class UpdatePassword(SQLModel):
 
 # Database model, database table inferred from class name
 class User(UserBase, table=True):
+    # Most users sign up with only one of email, phone or WeChat, so the
+    # optional lookup columns are mostly NULL: index only the rows that are set
+    __table_args__ = (
+        Index(
+            "ix_user_phone",
+            "phone",
+            unique=True,
+            postgresql_where=text("phone IS NOT NULL"),
+        ),
+        Index(
+            "ix_user_wechat_unionid",
+            "wechat_unionid",
+            postgresql_where=text("wechat_unionid IS NOT NULL"),
+        ),
+        Index(
+            "ix_user_deleted_at",
+            "deleted_at",
+            postgresql_where=text("deleted_at IS NOT NULL"),
+        ),
+    )
+
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     hashed_password: str
+    # Set when the user asked to be deleted, a background task then removes
+    # the row and its items
+    deleted_at: datetime | None = Field(
+        default=None,
+        sa_type=DateTime(timezone=True),  # type: ignore[call-overload]
+    )
     items: list["Item"] = Relationship(back_populates="owner", cascade_delete=True)
 
 
@@ -63,7 +95,10 @@ class UserPublic(UserBase):
 
 class UsersPublic(SQLModel):
     data: list[UserPublic]
-    count: int
+    # None when the count was not requested
+    count: int | None
+    # Keyset cursor of the next page, None on the last page
+    next_cursor: str | None = None
 
 
 # Shared properties
@@ -84,6 +119,10 @@ class ItemUpdate(ItemBase):
 
 # Database model, database table inferred from class name
 class Item(ItemBase, table=True):
+    # Serves the per owner listing in id order, its count and the cascade
+    # delete of a user's items
+    __table_args__ = (Index("ix_item_owner_id_id", "owner_id", "id"),)
+
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     owner_id: uuid.UUID = Field(
         foreign_key="user.id", nullable=False, ondelete="CASCADE"
@@ -99,7 +138,40 @@ class ItemPublic(ItemBase):
 
 class ItemsPublic(SQLModel):
     data: list[ItemPublic]
-    count: int
+    # None when the count was not requested
+    count: int | None
+    # Keyset cursor of the next page, None on the last page
+    next_cursor: str | None = None
+
+
+# Properties to receive on bulk item update, unset fields are left as is
+class ItemBulkUpdate(ItemUpdate):
+    id: uuid.UUID
+
+    # Only runs on a title that was sent, an unset title keeps the default
+    @field_validator("title")
+    @classmethod
+    def title_not_null(cls, title: str | None) -> str:
+        if title is None:
+            raise ValueError("title may be omitted but not null")
+        return title
+
+
+# A row of a bulk request that was not applied, index is its request position
+class ItemBulkError(SQLModel):
+    index: int
+    id: uuid.UUID | None = None
+    detail: str
+
+
+class ItemsBulkPublic(SQLModel):
+    data: list[ItemPublic]
+    errors: list[ItemBulkError]
+
+
+class ItemsBulkDeleted(SQLModel):
+    ids: list[uuid.UUID]
+    errors: list[ItemBulkError]
 
 
 # Generic message
@@ -155,3 +227,18 @@ class WechatLoginResponse(SQLModel):
 class BindPhoneRequest(SQLModel):
     phone: str = Field(min_length=11, max_length=11)
     code: str = Field(min_length=4, max_length=6)
+
+
+# Health of one dependency, latency_ms is None when it was not probed
+class DependencyHealth(SQLModel):
+    status: Literal["ok", "error", "disabled"]
+    critical: bool
+    latency_ms: float | None = None
+    error: str | None = None
+
+
+# Readiness report, degraded when only non critical dependencies are down
+class HealthReport(SQLModel):
+    status: Literal["ok", "degraded", "unavailable"]
+    checked_at: datetime
+    dependencies: dict[str, DependencyHealth]
@@ -5,25 +5,61 @@
 - 生成随机验证码
 - 存储验证码到 Redis
 - 验证用户输入的验证码
-- 调用阿里云短信服务发送短信
+- 通过 Celery sms 队列发送短信
 """
+
 import logging
 import random
 import string
 
-import redis
+from fastapi.concurrency import run_in_threadpool
+from kombu.exceptions import OperationalError
 
 from app.core.config import settings
+from app.core.redis_client import Script, get_redis
+from app.tasks.sms import send_sms_task
 
 logger = logging.getLogger(__name__)
 
-# Redis 客户端
-redis_client = redis.from_url(settings.REDIS_URL, decode_responses=True)
-
 # Redis key 前缀
 SMS_CODE_PREFIX = "sms:code:"
 SMS_RATE_LIMIT_PREFIX = "sms:rate:"
 
+# 验证码以 hash 存储: code 为验证码, attempts 为已失败的验证次数
+
+# 频率限制未被占用时, 在一次往返中占用频率限制并存储验证码
+# KEYS: 验证码 key, 频率限制 key  ARGV: 验证码, 有效秒数, 频率限制秒数
+reserve_code_script = Script(
+    """
+if redis.call('SET', KEYS[2], '1', 'NX', 'EX', ARGV[3]) then
+    redis.call('DEL', KEYS[1])
+    redis.call('HSET', KEYS[1], 'code', ARGV[1], 'attempts', 0)
+    redis.call('EXPIRE', KEYS[1], ARGV[2])
+    return 1
+end
+return 0
+"""
+)
+
+# 比较并删除验证码, 失败时累加 attempts, 达到上限后作废验证码
+# KEYS: 验证码 key  ARGV: 用户输入的验证码, 最大失败次数
+verify_code_script = Script(
+    """
+local code = redis.call('HGET', KEYS[1], 'code')
+if not code then
+    return 0
+end
+if code == ARGV[1] then
+    redis.call('DEL', KEYS[1])
+    return 1
+end
+if redis.call('HINCRBY', KEYS[1], 'attempts', 1) >= tonumber(ARGV[2]) then
+    redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+)
+
 
 def generate_code(length: int = 6) -> str:
     """生成随机数字验证码"""
@@ -40,112 +76,32 @@ def get_rate_limit_key(phone: str) -> str:
     return f"{SMS_RATE_LIMIT_PREFIX}{phone}"
 
 
-def store_code(phone: str, code: str) -> None:
-    """存储验证码到 Redis"""
-    key = get_sms_key(phone)
-    expire_seconds = settings.SMS_CODE_EXPIRE_MINUTES * 60
-    redis_client.setex(key, expire_seconds, code)
-
-
-def get_stored_code(phone: str) -> str | None:
-    """从 Redis 获取存储的验证码"""
-    key = get_sms_key(phone)
-    return redis_client.get(key)
-
-
-def delete_code(phone: str) -> None:
-    """删除已使用的验证码"""
-    key = get_sms_key(phone)
-    redis_client.delete(key)
-
-
-def check_rate_limit(phone: str) -> bool:
+async def reserve_code(phone: str, code: str, seconds: int = 60) -> bool:
     """
-    检查是否可以发送短信（频率限制）
-    返回 True 表示可以发送，False 表示需要等待
+    检查频率限制、存储验证码并设置频率限制, 只需一次 Redis 往返
+    返回 False 表示仍在频率限制内, 验证码未存储
     """
-    key = get_rate_limit_key(phone)
-    if redis_client.exists(key):
-        return False
-    return True
-
+    reserved = await reserve_code_script(
+        keys=[get_sms_key(phone), get_rate_limit_key(phone)],
+        args=[code, settings.SMS_CODE_EXPIRE_MINUTES * 60, seconds],
+    )
+    return bool(reserved)
 
-def set_rate_limit(phone: str, seconds: int = 60) -> None:
-    """设置频率限制（默认60秒内不能重复发送）"""
-    key = get_rate_limit_key(phone)
-    redis_client.setex(key, seconds, "1")
 
+async def release_code(phone: str) -> None:
+    """短信发送失败时撤销 reserve_code, 允许立即重试"""
+    await get_redis().delete(get_sms_key(phone), get_rate_limit_key(phone))
 
-def verify_code(phone: str, code: str) -> bool:
-    """验证用户输入的验证码"""
-    stored_code = get_stored_code(phone)
-    if stored_code is None:
-        return False
-    if stored_code != code:
-        return False
-    # 验证成功后删除验证码
-    delete_code(phone)
-    return True
 
-
-async def send_sms(phone: str, code: str) -> bool:
+async def verify_code(phone: str, code: str) -> bool:
     """
-    发送短信验证码
-
-    这里实现阿里云短信服务的调用
-    如果没有配置短信服务，在开发环境中直接返回成功
+    验证用户输入的验证码, 成功后验证码作废
+    连续失败 SMS_CODE_MAX_ATTEMPTS 次后验证码同样作废, 需要重新获取
     """
-    # 检查是否配置了短信服务
-    if not all(
-        [
-            settings.SMS_ACCESS_KEY_ID,
-            settings.SMS_ACCESS_KEY_SECRET,
-            settings.SMS_SIGN_NAME,
-            settings.SMS_TEMPLATE_CODE,
-        ]
-    ):
-        # 开发环境：直接打印验证码并返回成功
-        logger.warning(f"SMS service not configured. Code for {phone}: {code}")
-        return True
-
-    try:
-        # 阿里云短信服务
-        from alibabacloud_dysmsapi20170525 import models as dysmsapi_20170525_models
-        from alibabacloud_dysmsapi20170525.client import (
-            Client as Dysmsapi20170525Client,
-        )
-        from alibabacloud_tea_openapi import models as open_api_models
-
-        config = open_api_models.Config(
-            access_key_id=settings.SMS_ACCESS_KEY_ID,
-            access_key_secret=settings.SMS_ACCESS_KEY_SECRET,
-        )
-        config.endpoint = "dysmsapi.aliyuncs.com"
-        client = Dysmsapi20170525Client(config)
-
-        send_sms_request = dysmsapi_20170525_models.SendSmsRequest(
-            phone_numbers=phone,
-            sign_name=settings.SMS_SIGN_NAME,
-            template_code=settings.SMS_TEMPLATE_CODE,
-            template_param=f'{{"code":"{code}"}}',
-        )
-
-        response = client.send_sms(send_sms_request)
-
-        if response.body.code == "OK":
-            logger.info(f"SMS sent successfully to {phone}")
-            return True
-        else:
-            logger.error(f"SMS send failed: {response.body.message}")
-            return False
-
-    except ImportError:
-        # 如果没有安装阿里云SDK，在开发环境中直接返回成功
-        logger.warning(f"Aliyun SDK not installed. Code for {phone}: {code}")
-        return True
-    except Exception as e:
-        logger.error(f"SMS send error: {e}")
-        return False
+    verified = await verify_code_script(
+        keys=[get_sms_key(phone)], args=[code, settings.SMS_CODE_MAX_ATTEMPTS]
+    )
+    return bool(verified)
 
 
 async def send_verification_code(phone: str) -> tuple[bool, str]:
@@ -154,21 +110,20 @@ async def send_verification_code(phone: str) -> tuple[bool, str]:
 
     返回: (是否成功, 消息)
     """
-    # 检查频率限制
-    if not check_rate_limit(phone):
-        return False, "请求过于频繁，请稍后再试"
-
     # 生成验证码
     code = generate_code(settings.SMS_CODE_LENGTH)
 
-    # 发送短信
-    success = await send_sms(phone, code)
+    # 检查频率限制并存储验证码
+    # 发送前就存储是安全的, 验证码送达之前没有人知道它
+    if not await reserve_code(phone, code):
+        return False, "请求过于频繁，请稍后再试"
 
-    if success:
-        # 存储验证码
-        store_code(phone, code)
-        # 设置频率限制
-        set_rate_limit(phone)
-        return True, "验证码已发送"
-    else:
+    # 交给 sms 队列发送, 不等待短信服务商
+    try:
+        await run_in_threadpool(send_sms_task.delay, phone, code)
+    except OperationalError as e:
+        logger.error(f"SMS task enqueue failed: {e}")
+        await release_code(phone)
         return False, "短信发送失败，请稍后再试"
+
+    return True, "验证码已发送"
@@ -0,0 +1,85 @@
+"""
+短信服务商
+
+功能：
+- 调用阿里云短信服务发送短信 (同步调用, 在 Celery worker 中执行)
+- 本地 stub 服务商: 只打印验证码, 可模拟服务商延迟用于压测
+
+SMS_PROVIDER 未设置时, 配置了阿里云密钥则使用阿里云, 否则使用 stub
+"""
+
+import functools
+import logging
+import time
+from typing import Any
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@functools.cache
+def get_aliyun_client() -> Any:
+    """每个 worker 进程只创建一次阿里云短信客户端"""
+    from alibabacloud_dysmsapi20170525.client import (
+        Client as Dysmsapi20170525Client,
+    )
+    from alibabacloud_tea_openapi import models as open_api_models
+
+    config = open_api_models.Config(
+        access_key_id=settings.SMS_ACCESS_KEY_ID,
+        access_key_secret=settings.SMS_ACCESS_KEY_SECRET,
+    )
+    config.endpoint = "dysmsapi.aliyuncs.com"
+    return Dysmsapi20170525Client(config)
+
+
+def send_sms_aliyun(phone: str, code: str) -> bool:
+    try:
+        from alibabacloud_dysmsapi20170525 import models as dysmsapi_20170525_models
+
+        client = get_aliyun_client()
+    except ImportError:
+        # 如果没有安装阿里云SDK，在开发环境中直接返回成功
+        logger.warning(f"Aliyun SDK not installed. Code for {phone}: {code}")
+        return True
+
+    try:
+        send_sms_request = dysmsapi_20170525_models.SendSmsRequest(
+            phone_numbers=phone,
+            sign_name=settings.SMS_SIGN_NAME,
+            template_code=settings.SMS_TEMPLATE_CODE,
+            template_param=f'{{"code":"{code}"}}',
+        )
+
+        response = client.send_sms(send_sms_request)
+
+        if response.body.code == "OK":
+            logger.info(f"SMS sent successfully to {phone}")
+            return True
+        else:
+            logger.error(f"SMS send failed: {response.body.message}")
+            return False
+
+    except Exception as e:
+        logger.error(f"SMS send error: {e}")
+        return False
+
+
+def send_sms_stub(phone: str, code: str) -> bool:
+    if settings.SMS_STUB_LATENCY_MS:
+        time.sleep(settings.SMS_STUB_LATENCY_MS / 1000)
+    # 开发环境：直接打印验证码并返回成功
+    logger.warning(f"SMS service not configured. Code for {phone}: {code}")
+    return True
+
+
+def send_sms(phone: str, code: str) -> bool:
+    """
+    发送短信验证码
+
+    返回 True 表示服务商已受理
+    """
+    if settings.SMS_PROVIDER == "aliyun":
+        return send_sms_aliyun(phone, code)
+    return send_sms_stub(phone, code)
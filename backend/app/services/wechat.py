@@ -4,13 +4,18 @@
 功能：
 - 通过 code 换取 access_token 和 openid
 - 获取微信用户信息（昵称、头像）
+- 在 Redis 中缓存用户信息, 近期登录过的用户跳过用户信息接口
 """
+import json
 import logging
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass
 
 import httpx
+import redis
 
 from app.core.config import settings
+from app.core.http_client import get_http_client
+from app.core.redis_client import get_redis
 
 logger = logging.getLogger(__name__)
 
@@ -18,6 +23,9 @@ logger = logging.getLogger(__name__)
 WECHAT_ACCESS_TOKEN_URL = "https://api.weixin.qq.com/sns/oauth2/access_token"
 WECHAT_USER_INFO_URL = "https://api.weixin.qq.com/sns/userinfo"
 
+# Redis key 前缀
+WECHAT_PROFILE_PREFIX = "wechat:profile:"
+
 
 @dataclass
 class WechatUserInfo:
@@ -74,28 +82,25 @@ async def get_access_token(code: str) -> WechatAccessToken:
         "grant_type": "authorization_code",
     }
 
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(WECHAT_ACCESS_TOKEN_URL, params=params)
-            data = response.json()
-
-            if "errcode" in data:
-                logger.error(f"WeChat access_token error: {data}")
-                raise WechatServiceError(
-                    f"微信授权失败: {data.get('errmsg', '未知错误')}"
-                )
-
-            return WechatAccessToken(
-                access_token=data["access_token"],
-                expires_in=data["expires_in"],
-                refresh_token=data["refresh_token"],
-                openid=data["openid"],
-                scope=data["scope"],
-                unionid=data.get("unionid"),
-            )
-        except httpx.HTTPError as e:
-            logger.error(f"WeChat API request error: {e}")
-            raise WechatServiceError("微信服务请求失败")
+    try:
+        response = await get_http_client().get(WECHAT_ACCESS_TOKEN_URL, params=params)
+        data = response.json()
+
+        if "errcode" in data:
+            logger.error(f"WeChat access_token error: {data}")
+            raise WechatServiceError(f"微信授权失败: {data.get('errmsg', '未知错误')}")
+
+        return WechatAccessToken(
+            access_token=data["access_token"],
+            expires_in=data["expires_in"],
+            refresh_token=data["refresh_token"],
+            openid=data["openid"],
+            scope=data["scope"],
+            unionid=data.get("unionid"),
+        )
+    except httpx.HTTPError as e:
+        logger.error(f"WeChat API request error: {e}")
+        raise WechatServiceError("微信服务请求失败")
 
 
 async def get_user_info(access_token: str, openid: str) -> WechatUserInfo:
@@ -120,26 +125,56 @@ async def get_user_info(access_token: str, openid: str) -> WechatUserInfo:
         "lang": "zh_CN",
     }
 
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(WECHAT_USER_INFO_URL, params=params)
-            data = response.json()
-
-            if "errcode" in data:
-                logger.error(f"WeChat user info error: {data}")
-                raise WechatServiceError(
-                    f"获取用户信息失败: {data.get('errmsg', '未知错误')}"
-                )
-
-            return WechatUserInfo(
-                openid=data["openid"],
-                unionid=data.get("unionid"),
-                nickname=data.get("nickname"),
-                avatar=data.get("headimgurl"),
+    try:
+        response = await get_http_client().get(WECHAT_USER_INFO_URL, params=params)
+        data = response.json()
+
+        if "errcode" in data:
+            logger.error(f"WeChat user info error: {data}")
+            raise WechatServiceError(
+                f"获取用户信息失败: {data.get('errmsg', '未知错误')}"
             )
-        except httpx.HTTPError as e:
-            logger.error(f"WeChat API request error: {e}")
-            raise WechatServiceError("微信服务请求失败")
+
+        return WechatUserInfo(
+            openid=data["openid"],
+            unionid=data.get("unionid"),
+            nickname=data.get("nickname"),
+            avatar=data.get("headimgurl"),
+        )
+    except httpx.HTTPError as e:
+        logger.error(f"WeChat API request error: {e}")
+        raise WechatServiceError("微信服务请求失败")
+
+
+def get_profile_key(token_info: WechatAccessToken) -> str:
+    """获取用户信息缓存的 Redis key, 优先使用跨应用唯一的 UnionID"""
+    return f"{WECHAT_PROFILE_PREFIX}{token_info.unionid or token_info.openid}"
+
+
+async def get_cached_user_info(token_info: WechatAccessToken) -> WechatUserInfo | None:
+    """从 Redis 获取缓存的用户信息, 未命中或 Redis 不可用时返回 None"""
+    try:
+        raw = await get_redis().get(get_profile_key(token_info))
+    except redis.RedisError as e:
+        logger.warning(f"WeChat profile cache read failed: {e}")
+        return None
+    if raw is None:
+        return None
+    return WechatUserInfo(**json.loads(raw))
+
+
+async def cache_user_info(
+    token_info: WechatAccessToken, user_info: WechatUserInfo
+) -> None:
+    """缓存用户信息"""
+    try:
+        await get_redis().setex(
+            get_profile_key(token_info),
+            settings.WECHAT_PROFILE_CACHE_TTL_SECONDS,
+            json.dumps(asdict(user_info)),
+        )
+    except redis.RedisError as e:
+        logger.warning(f"WeChat profile cache write failed: {e}")
 
 
 async def wechat_login(code: str) -> WechatUserInfo:
@@ -147,13 +182,18 @@ async def wechat_login(code: str) -> WechatUserInfo:
     微信登录完整流程
 
     1. 通过 code 获取 access_token
-    2. 获取用户信息
+    2. 获取用户信息, 缓存有效期内直接使用缓存
     """
     token_info = await get_access_token(code)
+    user_info = await get_cached_user_info(token_info)
+    if user_info is not None and user_info.openid == token_info.openid:
+        return user_info
+
     user_info = await get_user_info(token_info.access_token, token_info.openid)
 
     # 如果从 access_token 响应中获取到了 unionid，优先使用
     if token_info.unionid and not user_info.unionid:
         user_info.unionid = token_info.unionid
 
+    await cache_user_info(token_info, user_info)
     return user_info
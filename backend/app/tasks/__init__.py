@@ -1,12 +1,22 @@
 """
 Celery tasks package
 """
-from app.tasks.email import send_email_task, send_test_email_task
+from app.tasks import metrics  # noqa: F401  connects the worker signals
+from app.tasks.email import (
+    send_bulk_email_task,
+    send_email_task,
+    send_test_email_task,
+)
 from app.tasks.maintenance import cleanup_expired_data, health_check_task
+from app.tasks.sms import send_sms_task
+from app.tasks.users import delete_user_task
 
 __all__ = [
     "send_email_task",
+    "send_bulk_email_task",
     "send_test_email_task",
     "cleanup_expired_data",
     "health_check_task",
+    "send_sms_task",
+    "delete_user_task",
 ]
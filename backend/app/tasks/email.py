@@ -1,8 +1,17 @@
 """
 Email related Celery tasks
 """
+from celery.signals import worker_process_init, worker_process_shutdown
+
 from app.core.celery_app import celery_app
-from app.utils import generate_test_email, send_email
+from app.core.smtp import smtp_pool
+from app.utils import (
+    EmailData,
+    generate_test_email,
+    load_email_templates,
+    send_email,
+    send_emails,
+)
 
 
 @celery_app.task(name="send_email_task")
@@ -30,6 +39,31 @@ def send_email_task(
     return {"status": "sent", "email": email_to}
 
 
+@celery_app.task(name="send_bulk_email_task")
+def send_bulk_email_task(messages: list[dict[str, str]]) -> dict[str, str | int]:
+    """
+    批量发送邮件, 所有邮件复用同一个 SMTP 连接
+
+    Args:
+        messages: 邮件列表, 每项包含 email_to, subject, html_content
+
+    Returns:
+        发送结果
+    """
+    sent = send_emails(
+        [
+            (
+                message["email_to"],
+                EmailData(
+                    subject=message["subject"], html_content=message["html_content"]
+                ),
+            )
+            for message in messages
+        ]
+    )
+    return {"status": "sent", "sent": sent, "failed": len(messages) - sent}
+
+
 @celery_app.task(name="send_test_email")
 def send_test_email_task(email_to: str) -> dict[str, str]:
     """
@@ -48,3 +82,13 @@ def send_test_email_task(email_to: str) -> dict[str, str]:
         html_content=email_data.html_content,
     )
     return {"status": "sent", "email": email_to}
+
+
+@worker_process_init.connect
+def compile_email_templates(**_kwargs: object) -> None:
+    load_email_templates()
+
+
+@worker_process_shutdown.connect
+def close_smtp_pool(**_kwargs: object) -> None:
+    smtp_pool.close()
@@ -1,50 +1,276 @@
 """
 Maintenance and cleanup Celery tasks
 """
+import asyncio
+import json
 import logging
+import time
+import uuid
+from collections.abc import Callable, Iterator
+from datetime import datetime, timedelta, timezone
+from typing import Any
 
+import redis
+from celery.backends.redis import RedisBackend
+from sqlalchemy import tuple_
+from sqlmodel import Session, col, delete, exists, select
+
+from app import crud
+from app.core import http_client, redis_client
+from app.core.cache import invalidate_user
 from app.core.celery_app import celery_app
+from app.core.config import settings
+from app.core.db import async_engine, engine
+from app.core.health import check_dependencies
+from app.models import HealthReport, Item, User
 
 logger = logging.getLogger(__name__)
 
 
-@celery_app.task(name="cleanup_expired_data")
-def cleanup_expired_data() -> dict[str, int]:
+def scan_keys_without_ttl(
+    client: redis.Redis, pattern: str, deadline: float
+) -> Iterator[list[Any]]:
+    """
+    用 SCAN 分批遍历匹配 pattern 的 key, 返回每批中没有过期时间的 key
+
+    SCAN 每次只遍历 CLEANUP_BATCH_SIZE 个 key, 不会像 KEYS 那样阻塞 Redis;
+    时间预算用完时停止遍历.
+    """
+    cursor = 0
+    while time.monotonic() < deadline:
+        cursor, keys = client.scan(  # type: ignore[misc]
+            cursor, match=pattern, count=settings.CLEANUP_BATCH_SIZE
+        )
+        if keys:
+            pipe = client.pipeline(transaction=False)
+            for key in keys:
+                pipe.ttl(key)
+            ttls: list[int] = pipe.execute()
+            orphaned = [key for key, ttl in zip(keys, ttls, strict=True) if ttl == -1]
+            if orphaned:
+                yield orphaned
+        if cursor == 0:
+            break
+
+
+def purge_keys_without_ttl(client: redis.Redis, pattern: str, deadline: float) -> int:
+    """
+    删除匹配 pattern 但没有过期时间的 key
+
+    短信验证码和限流计数写入时都带过期时间, 没有过期时间的 key 是旧版本
+    或中途失败留下的, 永远不会自己消失.
+
+    Returns:
+        删除的 key 数
+    """
+    cleaned = 0
+    for keys in scan_keys_without_ttl(client, pattern, deadline):
+        deleted: int = client.delete(*keys)  # type: ignore[assignment]
+        cleaned += deleted
+    return cleaned
+
+
+def _date_done(value: bytes | None) -> datetime | None:
+    try:
+        date_done = datetime.fromisoformat(json.loads(value or b"")["date_done"])
+    except (ValueError, TypeError, KeyError):
+        return None
+    if date_done.tzinfo is None:
+        date_done = date_done.replace(tzinfo=timezone.utc)
+    return date_done
+
+
+def purge_stale_task_results(backend: RedisBackend, deadline: float) -> int:
+    """
+    删除结果后端里没有过期时间的过期任务结果
+
+    结果写入时带 result_expires 过期时间, 在 result_expires 为空时写入的
+    结果会一直留在 Redis 里. 完成时间早于 result_expires 的结果直接删除,
+    其余的补上剩余的过期时间.
+
+    Returns:
+        删除的任务结果数
+    """
+    if not backend.expires:
+        return 0
+    client: redis.Redis = backend.client
+    expires = timedelta(seconds=backend.expires)
+    expires_before = datetime.now(timezone.utc) - expires
+    cleaned = 0
+    pattern = backend.get_key_for_task("*")
+    for keys in scan_keys_without_ttl(client, pattern, deadline):
+        values: list[bytes | None] = client.mget(keys)  # type: ignore[assignment]
+        stale = []
+        pipe = client.pipeline(transaction=False)
+        for key, value in zip(keys, values, strict=True):
+            date_done = _date_done(value)
+            if date_done is None or date_done < expires_before:
+                stale.append(key)
+            else:
+                pipe.expireat(key, date_done + expires)
+        pipe.execute()
+        if stale:
+            deleted: int = client.delete(*stale)  # type: ignore[assignment]
+            cleaned += deleted
+    return cleaned
+
+
+def purge_deleted_users(session: Session, deadline: float) -> int:
+    """
+    删除申请删除后超过宽限期仍未删完的用户及其 item
+
+    删除任务失败或重试次数用完时用户会停留在禁用状态. item 分批删除,
+    跳过其他事务锁住的行, 和仍在运行的删除任务互不等待; 还有 item
+    没删完的用户留到下一次运行.
+
+    Returns:
+        删除的用户数
+    """
+    deleted_before = datetime.now(timezone.utc) - timedelta(
+        minutes=settings.CLEANUP_DELETED_USER_GRACE_MINUTES
+    )
+    cleaned = 0
+    after: tuple[datetime | None, uuid.UUID] | None = None
+    while time.monotonic() < deadline:
+        statement = select(User.deleted_at, User.id).where(
+            col(User.deleted_at) < deleted_before
+        )
+        if after is not None:
+            statement = statement.where(
+                tuple_(col(User.deleted_at), col(User.id)) > after
+            )
+        statement = statement.order_by(col(User.deleted_at), col(User.id)).limit(
+            settings.CLEANUP_BATCH_SIZE
+        )
+        users = session.exec(statement).all()
+        session.commit()
+        for deleted_at, user_id in users:
+            if time.monotonic() >= deadline:
+                return cleaned
+            after = (deleted_at, user_id)
+            if _purge_deleted_user(session, user_id, deadline):
+                cleaned += 1
+        if len(users) < settings.CLEANUP_BATCH_SIZE:
+            break
+    return cleaned
+
+
+def _purge_deleted_user(session: Session, user_id: uuid.UUID, deadline: float) -> bool:
+    after_id = None
+    while time.monotonic() < deadline:
+        deleted = crud.delete_user_items_batch(
+            session=session,
+            owner_id=user_id,
+            batch_size=settings.CLEANUP_BATCH_SIZE,
+            after_id=after_id,
+            skip_locked=True,
+        )
+        if len(deleted) < settings.CLEANUP_BATCH_SIZE:
+            break
+        after_id = max(deleted)
+    else:
+        return False
+
+    # 只删除没有剩余 item 且没有被其他事务锁住的用户
+    locked = (
+        select(User.id)
+        .where(
+            col(User.id) == user_id,
+            ~exists().where(col(Item.owner_id) == user_id),
+        )
+        .with_for_update(skip_locked=True)
+    )
+    statement = delete(User).where(col(User.id).in_(locked)).returning(col(User.id))
+    result = session.exec(statement)  # type: ignore[call-overload]
+    deleted_user = result.scalar_one_or_none()
+    session.commit()
+    if deleted_user is None:
+        return False
+    invalidate_user(user_id)
+    return True
+
+
+@celery_app.task(name="app.tasks.maintenance.cleanup_expired_data")
+def cleanup_expired_data() -> dict[str, Any]:
     """
     清理过期数据的定时任务
 
+    依次清理各类过期数据, 每类分批处理, 整次运行共用
+    CLEANUP_TIME_BUDGET_SECONDS 的时间预算. 预算用完时停止, 状态为
+    partial, 剩余的数据留给下一次运行.
+
     Returns:
-        清理结果统计
+        清理结果统计, 包括每类清理的数量和耗时
     """
+    # app.services.sms 导入了 app.tasks, 在模块级导入会循环
+    from app.services.sms import SMS_CODE_PREFIX, SMS_RATE_LIMIT_PREFIX
+
     logger.info("Starting cleanup of expired data")
+    deadline = time.monotonic() + settings.CLEANUP_TIME_BUDGET_SECONDS
+
+    categories: dict[str, dict[str, int | float]] = {}
 
-    # TODO: 实现实际的清理逻辑
-    # 示例：清理过期的会话、临时文件等
+    def run(name: str, purge: Callable[[], int]) -> None:
+        started = time.monotonic()
+        if started >= deadline:
+            return
+        cleaned = purge()
+        seconds = round(time.monotonic() - started, 3)
+        categories[name] = {"cleaned": cleaned, "seconds": seconds}
+        logger.info(f"Cleanup of {name} removed {cleaned} in {seconds}s")
 
-    cleaned_count = 0
+    with redis.Redis.from_url(settings.REDIS_URL) as client:
+        run(
+            "sms_codes",
+            lambda: purge_keys_without_ttl(client, f"{SMS_CODE_PREFIX}*", deadline),
+        )
+        run(
+            "sms_rate_limits",
+            lambda: purge_keys_without_ttl(
+                client, f"{SMS_RATE_LIMIT_PREFIX}*", deadline
+            ),
+        )
+    backend = celery_app.backend
+    if isinstance(backend, RedisBackend):
+        run("task_results", lambda: purge_stale_task_results(backend, deadline))
+    with Session(engine) as session:
+        run("deleted_users", lambda: purge_deleted_users(session, deadline))
 
-    logger.info(f"Cleanup completed. Removed {cleaned_count} expired items")
+    cleaned_count = sum(int(c["cleaned"]) for c in categories.values())
+    status = "partial" if time.monotonic() >= deadline else "completed"
+
+    logger.info(f"Cleanup {status}. Removed {cleaned_count} expired items")
 
     return {
-        "status": "completed",
+        "status": status,
         "cleaned_count": cleaned_count,
+        "categories": categories,
     }
 
 
 @celery_app.task(name="health_check_task")
-def health_check_task() -> dict[str, str]:
+def health_check_task() -> dict[str, Any]:
     """
     健康检查任务
 
+    在 worker 中并发探测各个依赖, 不使用缓存, 结果可以和 API 进程的
+    就绪检查对照, 排查只影响 worker 的网络问题.
+
     Returns:
-        健康状态
+        健康报告, 包括每个依赖的状态和延迟
     """
     logger.info("Running health check task")
+    report = asyncio.run(_check_dependencies())
+    if report.status != "ok":
+        logger.warning(f"Health check {report.status}: {report.dependencies}")
+    return report.model_dump(mode="json")
 
-    # TODO: 添加实际的健康检查逻辑
-    # 例如：检查数据库连接、Redis连接、外部服务等
 
-    return {
-        "status": "healthy",
-        "message": "All systems operational",
-    }
+async def _check_dependencies() -> HealthReport:
+    try:
+        return await check_dependencies()
+    finally:
+        # 异步连接绑定在这次 asyncio.run 的事件循环上, 循环结束前关闭
+        await async_engine.dispose()
+        await redis_client.close()
+        await http_client.close()
@@ -0,0 +1,66 @@
+"""
+Celery worker metrics
+
+Task run times are recorded in the pool processes. With
+PROMETHEUS_MULTIPROC_DIR set, the main worker process serves the aggregated
+metrics of all of them on CELERY_METRICS_PORT.
+"""
+
+import logging
+import os
+import shutil
+import time
+from typing import Any
+
+from celery.signals import (
+    task_postrun,
+    task_prerun,
+    worker_init,
+    worker_process_shutdown,
+    worker_ready,
+)
+from prometheus_client import start_http_server
+
+from app.core import metrics
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# 正在运行的任务的开始时间, 按任务 ID
+_started: dict[str, float] = {}
+
+
+@worker_init.connect
+def clear_metrics_dir(**_kwargs: object) -> None:
+    # 主进程在启动 worker 子进程前清空上一次运行留下的指标文件
+    if metrics.MULTIPROC_DIR:
+        shutil.rmtree(metrics.MULTIPROC_DIR, ignore_errors=True)
+        os.makedirs(metrics.MULTIPROC_DIR, exist_ok=True)
+
+
+@worker_ready.connect
+def start_metrics_server(**_kwargs: object) -> None:
+    if settings.CELERY_METRICS_PORT:
+        start_http_server(settings.CELERY_METRICS_PORT, registry=metrics.get_registry())
+        logger.info(f"Serving worker metrics on port {settings.CELERY_METRICS_PORT}")
+
+
+@task_prerun.connect
+def record_task_start(task_id: str, **_kwargs: Any) -> None:
+    _started[task_id] = time.perf_counter()
+
+
+@task_postrun.connect
+def record_task_duration(
+    task_id: str, task: Any, state: str | None = None, **_kwargs: Any
+) -> None:
+    started = _started.pop(task_id, None)
+    if started is not None:
+        metrics.CELERY_TASK_DURATION.labels(
+            task=task.name, state=state or "UNKNOWN"
+        ).observe(time.perf_counter() - started)
+
+
+@worker_process_shutdown.connect
+def mark_worker_process_dead(**_kwargs: object) -> None:
+    metrics.mark_process_dead()
@@ -0,0 +1,37 @@
+"""
+SMS related Celery tasks
+"""
+
+import logging
+from typing import Any
+
+from app.core.celery_app import celery_app
+from app.services import sms_provider
+
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task(
+    name="app.tasks.sms.send_sms_task",
+    bind=True,
+    max_retries=3,
+    default_retry_delay=2,
+)
+def send_sms_task(self: Any, phone: str, code: str) -> dict[str, str]:
+    """
+    发送短信验证码, 服务商调用失败时重试
+
+    Args:
+        phone: 手机号
+        code: 验证码
+
+    Returns:
+        发送结果
+    """
+    if sms_provider.send_sms(phone, code):
+        return {"status": "sent", "phone": phone}
+    if self.request.retries < self.max_retries:
+        raise self.retry()
+    # 验证码会自然过期, 频率限制到期后用户可以重新获取
+    logger.error(f"SMS to {phone} failed after {self.max_retries} retries")
+    return {"status": "failed", "phone": phone}
@@ -0,0 +1,87 @@
+"""
+User related Celery tasks
+"""
+
+import logging
+import uuid
+from datetime import datetime, timezone
+from typing import Any
+
+from celery.exceptions import SoftTimeLimitExceeded
+from sqlmodel import Session, col, delete
+
+from app import crud
+from app.core.cache import invalidate_user
+from app.core.celery_app import celery_app
+from app.core.config import settings
+from app.core.db import engine
+from app.models import User
+
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task(
+    name="app.tasks.users.delete_user_task",
+    bind=True,
+    acks_late=True,
+    max_retries=5,
+    default_retry_delay=10,
+)
+def delete_user_task(self: Any, user_id: str) -> dict[str, str | int]:
+    """
+    删除用户及其所有 item
+
+    item 分批删除, 每批一个事务, 不会长时间持有锁; 进度通过任务状态
+    PROGRESS 上报. 已删除的批次已提交, 中断后重试会从剩余的 item 继续.
+
+    Args:
+        user_id: 用户 ID
+
+    Returns:
+        删除结果
+    """
+    owner_id = uuid.UUID(user_id)
+    deleted_items = 0
+    with Session(engine) as session:
+        user = session.get(User, owner_id)
+        if not user:
+            return {"status": "not_found", "user_id": user_id}
+        if user.is_active or user.deleted_at is None:
+            # 接口已经禁用了用户, 这里保证直接调用任务时用户也无法再登录,
+            # 任务没有删完时清理任务会根据 deleted_at 接着删除
+            user.is_active = False
+            user.deleted_at = user.deleted_at or datetime.now(timezone.utc)
+            session.add(user)
+            session.commit()
+            invalidate_user(owner_id)
+
+        try:
+            after_id = None
+            while True:
+                deleted = crud.delete_user_items_batch(
+                    session=session,
+                    owner_id=owner_id,
+                    batch_size=settings.USER_DELETE_BATCH_SIZE,
+                    after_id=after_id,
+                )
+                deleted_items += len(deleted)
+                self.update_state(
+                    state="PROGRESS",
+                    meta={"user_id": user_id, "deleted_items": deleted_items},
+                )
+                if len(deleted) < settings.USER_DELETE_BATCH_SIZE:
+                    break
+                after_id = max(deleted)
+        except SoftTimeLimitExceeded:
+            logger.warning(
+                f"Deleting user {user_id} timed out after {deleted_items} items, "
+                "continuing in a retry"
+            )
+            raise self.retry(countdown=0)
+
+        # 不通过 ORM 删除, User.items 的级联会先把 item 加载到内存
+        session.exec(delete(User).where(col(User.id) == owner_id))  # type: ignore[call-overload]
+        session.commit()
+    invalidate_user(owner_id)
+    logger.info(f"Deleted user {user_id} with {deleted_items} items")
+    return {"status": "deleted", "user_id": user_id, "deleted_items": deleted_items}
@@ -1,4 +1,6 @@
+import base64
 import logging
+import uuid
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
@@ -6,11 +8,12 @@ from typing import Any
 
 import emails  # type: ignore
 import jwt
-from jinja2 import Template
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
 from jwt.exceptions import InvalidTokenError
 
 from app.core import security
 from app.core.config import settings
+from app.core.smtp import smtp_pool
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -22,14 +25,36 @@ class EmailData:
     subject: str
 
 
+EMAIL_TEMPLATES_DIR = Path(__file__).parent / "email-templates" / "build"
+
+# Compiled templates stay in the environment's cache for the life of the
+# process, the bytecode cache lets new worker processes skip compilation
+email_templates = Environment(
+    loader=FileSystemLoader(EMAIL_TEMPLATES_DIR),
+    bytecode_cache=FileSystemBytecodeCache(),
+    auto_reload=settings.ENVIRONMENT == "local",
+)
+
+
+def load_email_templates() -> None:
+    """Compile every email template up front instead of on the first send"""
+    for template_name in email_templates.list_templates(extensions=["html"]):
+        email_templates.get_template(template_name)
+
+
 def render_email_template(*, template_name: str, context: dict[str, Any]) -> str:
-    template_str = (
-        Path(__file__).parent / "email-templates" / "build" / template_name
-    ).read_text()
-    html_content = Template(template_str).render(context)
+    html_content = email_templates.get_template(template_name).render(context)
     return html_content
 
 
+def _build_message(subject: str, html_content: str) -> Any:
+    return emails.Message(
+        subject=subject,
+        html=html_content,
+        mail_from=(settings.EMAILS_FROM_NAME, settings.EMAILS_FROM_EMAIL),
+    )
+
+
 def send_email(
     *,
     email_to: str,
@@ -37,24 +62,31 @@ def send_email(
     html_content: str = "",
 ) -> None:
     assert settings.emails_enabled, "no provided configuration for email variables"
-    message = emails.Message(
-        subject=subject,
-        html=html_content,
-        mail_from=(settings.EMAILS_FROM_NAME, settings.EMAILS_FROM_EMAIL),
-    )
-    smtp_options = {"host": settings.SMTP_HOST, "port": settings.SMTP_PORT}
-    if settings.SMTP_TLS:
-        smtp_options["tls"] = True
-    elif settings.SMTP_SSL:
-        smtp_options["ssl"] = True
-    if settings.SMTP_USER:
-        smtp_options["user"] = settings.SMTP_USER
-    if settings.SMTP_PASSWORD:
-        smtp_options["password"] = settings.SMTP_PASSWORD
-    response = message.send(to=email_to, smtp=smtp_options)
+    message = _build_message(subject, html_content)
+    with smtp_pool.connection() as smtp:
+        response = message.send(to=email_to, smtp=smtp)
     logger.info(f"send email result: {response}")
 
 
+def send_emails(messages: list[tuple[str, EmailData]]) -> int:
+    """
+    Send (email_to, email_data) pairs over a single SMTP connection.
+
+    Returns the number of messages the server accepted, failures are logged.
+    """
+    assert settings.emails_enabled, "no provided configuration for email variables"
+    sent = 0
+    with smtp_pool.connection() as smtp:
+        for email_to, email_data in messages:
+            message = _build_message(email_data.subject, email_data.html_content)
+            response = message.send(to=email_to, smtp=smtp)
+            if response.success:
+                sent += 1
+            else:
+                logger.warning(f"send email to {email_to} failed: {response}")
+    return sent
+
+
 def generate_test_email(email_to: str) -> EmailData:
     project_name = settings.PROJECT_NAME
     subject = f"{project_name} - Test email"
@@ -121,3 +153,16 @@ def verify_password_reset_token(token: str) -> str | None:
         return str(decoded_token["sub"])
     except InvalidTokenError:
         return None
+
+
+def encode_cursor(last_id: uuid.UUID) -> str:
+    """Opaque keyset cursor pointing after the row with the given id"""
+    return base64.urlsafe_b64encode(last_id.bytes).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str) -> uuid.UUID | None:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return uuid.UUID(bytes=base64.urlsafe_b64decode(padded))
+    except ValueError:
+        return None
@@ -0,0 +1,61 @@
+"""
+Email sending throughput benchmark
+
+Sends the same batch once with a fresh SMTP connection per message, the way
+send_email used to, and once over a pooled connection with send_emails. Point
+it at a debugging SMTP server such as the Mailcatcher from
+docker-compose.override.yml, e.g.:
+
+    SMTP_HOST=localhost SMTP_PORT=1025 SMTP_TLS=False \\
+        PYTHONPATH=. python scripts/benchmark_email.py --messages 200
+"""
+
+import argparse
+import logging
+import time
+
+import emails  # type: ignore
+
+from app.core.config import settings
+from app.core.smtp import smtp_options, smtp_pool
+from app.utils import EmailData, generate_test_email, send_emails
+
+logging.basicConfig(level=logging.INFO, format="%(message)s")
+logger = logging.getLogger(__name__)
+
+
+def send_unpooled(messages: list[tuple[str, EmailData]]) -> None:
+    for email_to, email_data in messages:
+        message = emails.Message(
+            subject=email_data.subject,
+            html=email_data.html_content,
+            mail_from=(settings.EMAILS_FROM_NAME, settings.EMAILS_FROM_EMAIL),
+        )
+        # A dict makes emails open, and never reuse, a connection of its own
+        response = message.send(to=email_to, smtp=smtp_options())
+        response.backend.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=100)
+    args = parser.parse_args()
+    email_data = generate_test_email(email_to=settings.EMAIL_TEST_USER)
+    messages = [(settings.EMAIL_TEST_USER, email_data)] * args.messages
+
+    start = time.perf_counter()
+    send_unpooled(messages)
+    elapsed = time.perf_counter() - start
+    logger.info(f"connection per message: {args.messages / elapsed:7.1f} emails/s")
+
+    start = time.perf_counter()
+    sent = send_emails(messages)
+    elapsed = time.perf_counter() - start
+    logger.info(f"pooled connection:      {args.messages / elapsed:7.1f} emails/s")
+    smtp_pool.close()
+    if sent != args.messages:
+        logger.warning(f"only {sent} of {args.messages} messages were accepted")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Email template rendering benchmark
+
+Compares reading and compiling the template file on every render, the way
+render_email_template used to, with rendering from the shared Jinja
+environment, e.g.:
+
+    PYTHONPATH=. python scripts/benchmark_email_templates.py --renders 2000
+"""
+
+import argparse
+import logging
+import time
+
+from jinja2 import Template
+
+from app.utils import EMAIL_TEMPLATES_DIR, load_email_templates, render_email_template
+
+logging.basicConfig(level=logging.INFO, format="%(message)s")
+logger = logging.getLogger(__name__)
+
+TEMPLATE_NAME = "reset_password.html"
+CONTEXT = {
+    "project_name": "Benchmark",
+    "username": "user@example.com",
+    "email": "user@example.com",
+    "valid_hours": 48,
+    "link": "http://localhost:5173/reset-password?token=token",
+}
+
+
+def render_uncached() -> str:
+    template_str = (EMAIL_TEMPLATES_DIR / TEMPLATE_NAME).read_text()
+    return Template(template_str).render(CONTEXT)
+
+
+def render_cached() -> str:
+    return render_email_template(template_name=TEMPLATE_NAME, context=CONTEXT)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--renders", type=int, default=1000)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    load_email_templates()
+    logger.info(
+        f"precompile all templates: {(time.perf_counter() - start) * 1e3:.1f}ms"
+    )
+
+    for label, render in (
+        ("read + compile", render_uncached),
+        ("cached", render_cached),
+    ):
+        start = time.perf_counter()
+        for _ in range(args.renders):
+            render()
+        elapsed = time.perf_counter() - start
+        logger.info(f"{label:<15} {elapsed / args.renders * 1e6:8.1f}us per render")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Item import benchmark
+
+Imports items as the first superuser, once with one POST /items/ per item
+and once through POST /items/bulk in batches, and logs items per second. Runs
+in process against the database of the local stack, e.g.:
+
+    PYTHONPATH=. python scripts/benchmark_items_bulk.py --items 10000
+"""
+
+import argparse
+import logging
+import time
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.core.db import engine, init_db
+from app.main import app
+
+logging.basicConfig(level=logging.WARNING, format="%(message)s")
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--items", type=int, default=10_000)
+    parser.add_argument("--batch", type=int, default=1000)
+    parser.add_argument(
+        "--single", type=int, default=1000, help="items imported one by one"
+    )
+    args = parser.parse_args()
+    settings.RATE_LIMIT_ENABLED = False
+    with Session(engine) as session:
+        init_db(session)
+    api = settings.API_V1_STR
+    with TestClient(app) as client:
+        r = client.post(
+            f"{api}/login/access-token",
+            data={
+                "username": settings.FIRST_SUPERUSER,
+                "password": settings.FIRST_SUPERUSER_PASSWORD,
+            },
+        )
+        headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+        start = time.perf_counter()
+        for i in range(args.single):
+            client.post(
+                f"{api}/items/", headers=headers, json={"title": f"item {i}"}
+            ).raise_for_status()
+        elapsed = time.perf_counter() - start
+        logger.info(f"one by one  items/s={args.single / elapsed:8.0f}")
+
+        ids = []
+        start = time.perf_counter()
+        for offset in range(0, args.items, args.batch):
+            count = min(args.batch, args.items - offset)
+            r = client.post(
+                f"{api}/items/bulk",
+                headers=headers,
+                json=[{"title": f"item {offset + i}"} for i in range(count)],
+            )
+            r.raise_for_status()
+            ids += [item["id"] for item in r.json()["data"]]
+        elapsed = time.perf_counter() - start
+        logger.info(f"bulk create items/s={args.items / elapsed:8.0f}")
+
+        start = time.perf_counter()
+        for offset in range(0, len(ids), args.batch):
+            batch = ids[offset : offset + args.batch]
+            client.patch(
+                f"{api}/items/bulk",
+                headers=headers,
+                json=[{"id": item_id, "description": "imported"} for item_id in batch],
+            ).raise_for_status()
+        elapsed = time.perf_counter() - start
+        logger.info(f"bulk update items/s={len(ids) / elapsed:8.0f}")
+
+        start = time.perf_counter()
+        for offset in range(0, len(ids), args.batch):
+            client.request(
+                "DELETE",
+                f"{api}/items/bulk",
+                headers=headers,
+                json=ids[offset : offset + args.batch],
+            ).raise_for_status()
+        elapsed = time.perf_counter() - start
+        logger.info(f"bulk delete items/s={len(ids) / elapsed:8.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Login throughput benchmark
+
+Runs /login/access-token at 1, 4 and 16 concurrent clients against a running
+backend and logs requests per second and latency percentiles, e.g.:
+
+    fastapi run --workers 4 app/main.py &
+    PYTHONPATH=. python scripts/benchmark_login.py --url http://localhost:8000
+"""
+
+import argparse
+import asyncio
+import logging
+import statistics
+import time
+
+import httpx
+
+from app.core.config import settings
+
+logging.basicConfig(level=logging.INFO, format="%(message)s")
+logger = logging.getLogger(__name__)
+
+
+async def run_client(
+    client: httpx.AsyncClient, requests: int, latencies: list[float]
+) -> int:
+    login_data = {
+        "username": settings.FIRST_SUPERUSER,
+        "password": settings.FIRST_SUPERUSER_PASSWORD,
+    }
+    rejected = 0
+    for _ in range(requests):
+        start = time.perf_counter()
+        r = await client.post(
+            f"{settings.API_V1_STR}/login/access-token", data=login_data
+        )
+        latencies.append(time.perf_counter() - start)
+        if r.status_code == 503:
+            rejected += 1
+        else:
+            r.raise_for_status()
+    return rejected
+
+
+async def run(url: str, concurrency: int, requests: int) -> None:
+    latencies: list[float] = []
+    async with httpx.AsyncClient(base_url=url, timeout=60) as client:
+        start = time.perf_counter()
+        rejected = await asyncio.gather(
+            *(run_client(client, requests, latencies) for _ in range(concurrency))
+        )
+        elapsed = time.perf_counter() - start
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    logger.info(
+        f"clients={concurrency:<3} logins/s={len(latencies) / elapsed:7.1f} "
+        f"p50={statistics.median(latencies) * 1000:6.0f}ms "
+        f"p99={p99 * 1000:6.0f}ms rejected={sum(rejected)}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--requests", type=int, default=20, help="per client")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    args = parser.parse_args()
+    for concurrency in args.concurrency:
+        asyncio.run(run(args.url, concurrency, args.requests))
+
+
+if __name__ == "__main__":
+    main()
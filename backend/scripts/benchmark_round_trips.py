@@ -0,0 +1,112 @@
+"""
+Database round trips per write endpoint
+
+Calls each write endpoint in process and logs how many statements it sent to
+the database, counting every cursor execute and every COMMIT. Needs the
+database and Redis from the local stack, e.g.:
+
+    PYTHONPATH=. python scripts/benchmark_round_trips.py
+"""
+
+import logging
+import random
+from collections.abc import Callable
+from typing import Any
+
+from fastapi.testclient import TestClient
+from httpx import Response
+from sqlalchemy import event
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.core.db import async_engine, engine, init_db
+from app.main import app
+from tests.utils.utils import random_email, random_lower_string
+
+logging.basicConfig(level=logging.WARNING, format="%(message)s")
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+round_trips = 0
+
+
+def count_round_trip(*_args: Any) -> None:
+    global round_trips
+    round_trips += 1
+
+
+def measure(name: str, call: Callable[[], Response]) -> Response:
+    global round_trips
+    round_trips = 0
+    r = call()
+    r.raise_for_status()
+    logger.info(f"{name:<28} round_trips={round_trips}")
+    return r
+
+
+def main() -> None:
+    event.listen(async_engine.sync_engine, "before_cursor_execute", count_round_trip)
+    event.listen(async_engine.sync_engine, "commit", count_round_trip)
+    settings.RATE_LIMIT_ENABLED = False
+    with Session(engine) as session:
+        init_db(session)
+    api = settings.API_V1_STR
+    with TestClient(app) as client:
+        r = client.post(
+            f"{api}/login/access-token",
+            data={
+                "username": settings.FIRST_SUPERUSER,
+                "password": settings.FIRST_SUPERUSER_PASSWORD,
+            },
+        )
+        headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+        # Warm up the user cache so that only the write itself is counted
+        client.get(f"{api}/users/me", headers=headers).raise_for_status()
+
+        item = measure(
+            "POST /items/",
+            lambda: client.post(
+                f"{api}/items/", headers=headers, json={"title": "title"}
+            ),
+        ).json()
+        measure(
+            "PUT /items/{id}",
+            lambda: client.put(
+                f"{api}/items/{item['id']}", headers=headers, json={"title": "new"}
+            ),
+        )
+        measure(
+            "PATCH /users/me",
+            lambda: client.patch(
+                f"{api}/users/me",
+                headers=headers,
+                json={"full_name": random_lower_string()},
+            ),
+        )
+        measure(
+            "POST /users/",
+            lambda: client.post(
+                f"{api}/users/",
+                headers=headers,
+                json={"email": random_email(), "password": random_lower_string()},
+            ),
+        )
+        user = measure(
+            "POST /users/signup",
+            lambda: client.post(
+                f"{api}/users/signup",
+                json={"email": random_email(), "password": random_lower_string()},
+            ),
+        ).json()
+        measure(
+            "PATCH /users/{id}",
+            lambda: client.patch(
+                f"{api}/users/{user['id']}",
+                headers=headers,
+                json={"phone": "139" + "".join(random.choices("0123456789", k=8))},
+            ),
+        )
+
+
+if __name__ == "__main__":
+    main()
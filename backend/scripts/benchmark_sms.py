@@ -0,0 +1,74 @@
+"""
+SMS code endpoint latency benchmark
+
+Calls /auth/sms/send at 1, 4 and 16 concurrent clients against a running
+backend and logs requests per second and latency percentiles. Every request
+uses a fresh phone number so the per-phone rate limit never triggers. Run the
+backend with the stub provider and a simulated provider latency, e.g.:
+
+    SMS_PROVIDER=stub SMS_STUB_LATENCY_MS=300 fastapi run app/main.py &
+    SMS_PROVIDER=stub SMS_STUB_LATENCY_MS=300 \\
+        celery -A app.core.celery_app worker -Q sms &
+    PYTHONPATH=. python scripts/benchmark_sms.py --url http://localhost:8000
+"""
+
+import argparse
+import asyncio
+import logging
+import random
+import statistics
+import time
+
+import httpx
+
+from app.core.config import settings
+
+logging.basicConfig(level=logging.INFO, format="%(message)s")
+logger = logging.getLogger(__name__)
+
+
+def random_phone() -> str:
+    return "139" + "".join(random.choices("0123456789", k=8))
+
+
+async def run_client(
+    client: httpx.AsyncClient, requests: int, latencies: list[float]
+) -> None:
+    for _ in range(requests):
+        start = time.perf_counter()
+        r = await client.post(
+            f"{settings.API_V1_STR}/auth/sms/send", json={"phone": random_phone()}
+        )
+        latencies.append(time.perf_counter() - start)
+        r.raise_for_status()
+
+
+async def run(url: str, concurrency: int, requests: int) -> None:
+    latencies: list[float] = []
+    async with httpx.AsyncClient(base_url=url, timeout=60) as client:
+        start = time.perf_counter()
+        await asyncio.gather(
+            *(run_client(client, requests, latencies) for _ in range(concurrency))
+        )
+        elapsed = time.perf_counter() - start
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    logger.info(
+        f"clients={concurrency:<3} requests/s={len(latencies) / elapsed:7.1f} "
+        f"p50={statistics.median(latencies) * 1000:6.0f}ms "
+        f"p99={p99 * 1000:6.0f}ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--requests", type=int, default=50, help="per client")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    args = parser.parse_args()
+    for concurrency in args.concurrency:
+        asyncio.run(run(args.url, concurrency, args.requests))
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,9 @@
 set -e
 set -x
 
+# Password hashing cost is irrelevant to the tests, keep it cheap
+export PASSWORD_BCRYPT_ROUNDS="${PASSWORD_BCRYPT_ROUNDS:-4}"
+
 coverage run -m pytest tests/
 coverage report
 coverage html --title "${@-coverage}"
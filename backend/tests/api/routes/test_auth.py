@@ -0,0 +1,129 @@
+import random
+import uuid
+from collections.abc import Generator
+from unittest.mock import patch
+
+import pytest
+import redis
+from fastapi.testclient import TestClient
+from kombu.exceptions import OperationalError
+
+from app.core.config import settings
+from app.services import sms
+
+
+def random_phone() -> str:
+    return "139" + "".join(random.choices("0123456789", k=8))
+
+
+@pytest.fixture(scope="module")
+def redis_client() -> Generator[redis.Redis, None, None]:
+    client = redis.from_url(settings.REDIS_URL, decode_responses=True)  # type: ignore[no-untyped-call]
+    yield client
+    client.close()
+
+
+def test_send_sms_code(client: TestClient, redis_client: redis.Redis) -> None:
+    phone = random_phone()
+    r = client.post(f"{settings.API_V1_STR}/auth/sms/send", json={"phone": phone})
+    assert r.status_code == 200
+    code = redis_client.hget(sms.get_sms_key(phone), "code")
+    assert code is not None
+    assert len(code) == settings.SMS_CODE_LENGTH
+    assert redis_client.ttl(sms.get_rate_limit_key(phone)) > 0
+
+
+def test_send_sms_code_rate_limited(
+    client: TestClient, redis_client: redis.Redis
+) -> None:
+    phone = random_phone()
+    r = client.post(f"{settings.API_V1_STR}/auth/sms/send", json={"phone": phone})
+    assert r.status_code == 200
+    code = redis_client.hget(sms.get_sms_key(phone), "code")
+    r = client.post(f"{settings.API_V1_STR}/auth/sms/send", json={"phone": phone})
+    assert r.status_code == 400
+    # The rejected request must not replace the code that was sent
+    assert redis_client.hget(sms.get_sms_key(phone), "code") == code
+
+
+def test_send_sms_code_enqueues_task(
+    client: TestClient, redis_client: redis.Redis
+) -> None:
+    phone = random_phone()
+    with patch("app.services.sms.send_sms_task.delay") as delay:
+        r = client.post(f"{settings.API_V1_STR}/auth/sms/send", json={"phone": phone})
+    assert r.status_code == 200
+    code = redis_client.hget(sms.get_sms_key(phone), "code")
+    delay.assert_called_once_with(phone, code)
+
+
+def test_send_sms_code_enqueue_failure_releases_rate_limit(
+    client: TestClient, redis_client: redis.Redis
+) -> None:
+    phone = random_phone()
+    with patch(
+        "app.services.sms.send_sms_task.delay",
+        side_effect=OperationalError("broker down"),
+    ):
+        r = client.post(f"{settings.API_V1_STR}/auth/sms/send", json={"phone": phone})
+    assert r.status_code == 400
+    assert redis_client.hget(sms.get_sms_key(phone), "code") is None
+    assert not redis_client.exists(sms.get_rate_limit_key(phone))
+    r = client.post(f"{settings.API_V1_STR}/auth/sms/send", json={"phone": phone})
+    assert r.status_code == 200
+
+
+def test_phone_login_with_sms_code(
+    client: TestClient, redis_client: redis.Redis
+) -> None:
+    phone = random_phone()
+    r = client.post(f"{settings.API_V1_STR}/auth/sms/send", json={"phone": phone})
+    assert r.status_code == 200
+    code = redis_client.hget(sms.get_sms_key(phone), "code")
+    r = client.post(
+        f"{settings.API_V1_STR}/auth/phone/login", json={"phone": phone, "code": code}
+    )
+    assert r.status_code == 200
+    assert "access_token" in r.json()
+    # Codes are single use
+    r = client.post(
+        f"{settings.API_V1_STR}/auth/phone/login", json={"phone": phone, "code": code}
+    )
+    assert r.status_code == 400
+
+
+def test_phone_login_locks_code_after_failed_attempts(
+    client: TestClient, redis_client: redis.Redis
+) -> None:
+    phone = random_phone()
+    r = client.post(f"{settings.API_V1_STR}/auth/sms/send", json={"phone": phone})
+    assert r.status_code == 200
+    code = redis_client.hget(sms.get_sms_key(phone), "code")
+    assert code is not None
+    wrong_code = str((int(code) + 1) % 10**settings.SMS_CODE_LENGTH).zfill(
+        settings.SMS_CODE_LENGTH
+    )
+    for _ in range(settings.SMS_CODE_MAX_ATTEMPTS):
+        r = client.post(
+            f"{settings.API_V1_STR}/auth/phone/login",
+            json={"phone": phone, "code": wrong_code},
+        )
+        assert r.status_code == 400
+    # The right code no longer works once the attempts are used up
+    r = client.post(
+        f"{settings.API_V1_STR}/auth/phone/login", json={"phone": phone, "code": code}
+    )
+    assert r.status_code == 400
+    assert not redis_client.exists(sms.get_sms_key(phone))
+
+
+def test_wechat_login_caches_profile(client: TestClient) -> None:
+    code = uuid.uuid4().hex
+    r = client.post(f"{settings.API_V1_STR}/auth/wechat/login", json={"code": code})
+    assert r.status_code == 200
+    user = r.json()["user"]
+    with patch("app.services.wechat.get_user_info") as get_user_info:
+        r = client.post(f"{settings.API_V1_STR}/auth/wechat/login", json={"code": code})
+    assert r.status_code == 200
+    assert r.json()["user"] == user
+    get_user_info.assert_not_called()
@@ -1,9 +1,13 @@
+import csv
+import io
 import uuid
 
 from fastapi.testclient import TestClient
-from sqlmodel import Session
+from sqlalchemy import text
+from sqlmodel import Session, col, func, select
 
 from app.core.config import settings
+from app.models import Item
 from tests.utils.item import create_random_item
 
 
@@ -79,6 +83,117 @@ def test_read_items(
     assert len(content["data"]) >= 2
 
 
+def test_read_items_cursor(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    for _ in range(3):
+        create_random_item(db)
+    response = client.get(
+        f"{settings.API_V1_STR}/items/",
+        headers=superuser_token_headers,
+        params={"limit": 2},
+    )
+    assert response.status_code == 200
+    first_page = response.json()
+    assert len(first_page["data"]) == 2
+    assert first_page["next_cursor"]
+    response = client.get(
+        f"{settings.API_V1_STR}/items/",
+        headers=superuser_token_headers,
+        params={"limit": 2, "cursor": first_page["next_cursor"]},
+    )
+    assert response.status_code == 200
+    second_page = response.json()
+    assert second_page["data"]
+    assert second_page["count"] == first_page["count"]
+    first_ids = [uuid.UUID(item["id"]) for item in first_page["data"]]
+    second_ids = [uuid.UUID(item["id"]) for item in second_page["data"]]
+    assert first_ids == sorted(first_ids)
+    assert min(second_ids) > max(first_ids)
+
+
+def test_read_items_count_modes(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    create_random_item(db)
+    exact_count = db.exec(select(func.count()).select_from(Item)).one()
+    url = f"{settings.API_V1_STR}/items/"
+
+    response = client.get(url, headers=superuser_token_headers)
+    assert response.json()["count"] == exact_count
+
+    response = client.get(
+        url, headers=superuser_token_headers, params={"skip": exact_count + 10}
+    )
+    content = response.json()
+    assert content["data"] == []
+    assert content["count"] == exact_count
+
+    response = client.get(
+        url, headers=superuser_token_headers, params={"include_count": False}
+    )
+    content = response.json()
+    assert content["data"]
+    assert content["count"] is None
+
+    db.execute(text("ANALYZE item"))
+    response = client.get(
+        url, headers=superuser_token_headers, params={"approximate_count": True}
+    )
+    assert response.json()["count"] == exact_count
+
+
+def test_read_items_invalid_cursor(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    response = client.get(
+        f"{settings.API_V1_STR}/items/",
+        headers=superuser_token_headers,
+        params={"cursor": "not-a-cursor"},
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
+
+
+def test_export_items(
+    client: TestClient, normal_user_token_headers: dict[str, str], db: Session
+) -> None:
+    response = client.post(
+        f"{settings.API_V1_STR}/items/bulk",
+        headers=normal_user_token_headers,
+        json=[{"title": "Export", "description": 'a, "quoted" value'}] * 3,
+    )
+    owner_id = response.json()["data"][0]["owner_id"]
+    create_random_item(db)
+    count = db.exec(
+        select(func.count()).select_from(Item).where(Item.owner_id == owner_id)
+    ).one()
+
+    response = client.get(
+        f"{settings.API_V1_STR}/items/export",
+        headers=normal_user_token_headers,
+        params={"format": "csv"},
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "text/csv; charset=utf-8"
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    # Only the caller's own items
+    assert len(rows) == count
+    assert {row["owner_id"] for row in rows} == {owner_id}
+    assert 'a, "quoted" value' in {row["description"] for row in rows}
+
+
+def test_export_items_invalid_format(
+    client: TestClient, normal_user_token_headers: dict[str, str]
+) -> None:
+    response = client.get(
+        f"{settings.API_V1_STR}/items/export",
+        headers=normal_user_token_headers,
+        params={"format": "xml"},
+    )
+    assert response.status_code == 422
+
+
 def test_update_item(
     client: TestClient, superuser_token_headers: dict[str, str], db: Session
 ) -> None:
@@ -162,3 +277,135 @@ def test_delete_item_not_enough_permissions(
     assert response.status_code == 400
     content = response.json()
     assert content["detail"] == "Not enough permissions"
+
+
+def test_create_items_bulk(
+    client: TestClient, normal_user_token_headers: dict[str, str]
+) -> None:
+    data = [{"title": f"Bulk {i}", "description": "bulk"} for i in range(3)]
+    response = client.post(
+        f"{settings.API_V1_STR}/items/bulk",
+        headers=normal_user_token_headers,
+        json=data,
+    )
+    assert response.status_code == 200
+    content = response.json()
+    assert [item["title"] for item in content["data"]] == ["Bulk 0", "Bulk 1", "Bulk 2"]
+    assert len({item["owner_id"] for item in content["data"]}) == 1
+    assert content["errors"] == []
+
+
+def test_create_items_bulk_invalid_row(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    count = db.exec(select(func.count()).select_from(Item)).one()
+    response = client.post(
+        f"{settings.API_V1_STR}/items/bulk",
+        headers=superuser_token_headers,
+        json=[{"title": "Foo"}, {"title": ""}],
+    )
+    # Nothing is written when any row is invalid
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"] == ["body", 1, "title"]
+    assert db.exec(select(func.count()).select_from(Item)).one() == count
+
+
+def test_create_items_bulk_too_many(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    response = client.post(
+        f"{settings.API_V1_STR}/items/bulk",
+        headers=superuser_token_headers,
+        json=[{"title": "Foo"}] * (settings.ITEMS_BULK_MAX_SIZE + 1),
+    )
+    assert response.status_code == 422
+
+
+def test_update_items_bulk(
+    client: TestClient, normal_user_token_headers: dict[str, str], db: Session
+) -> None:
+    response = client.post(
+        f"{settings.API_V1_STR}/items/bulk",
+        headers=normal_user_token_headers,
+        json=[{"title": "One", "description": "first"}, {"title": "Two"}],
+    )
+    first, second = response.json()["data"]
+    foreign = create_random_item(db)
+    missing = uuid.uuid4()
+    data = [
+        {"id": second["id"], "description": "second"},
+        {"id": foreign.id.hex, "title": "Taken"},
+        {"id": first["id"], "title": "Uno", "description": None},
+        {"id": missing.hex, "title": "Missing"},
+        {"id": second["id"], "title": "Repeated"},
+    ]
+    response = client.patch(
+        f"{settings.API_V1_STR}/items/bulk",
+        headers=normal_user_token_headers,
+        json=data,
+    )
+    assert response.status_code == 200
+    content = response.json()
+    # Unset fields keep their value, an explicit null clears it
+    assert [
+        (item["id"], item["title"], item["description"]) for item in content["data"]
+    ] == [(second["id"], "Two", "second"), (first["id"], "Uno", None)]
+    assert content["errors"] == [
+        {"index": 1, "id": str(foreign.id), "detail": "Not enough permissions"},
+        {"index": 3, "id": str(missing), "detail": "Item not found"},
+        {"index": 4, "id": second["id"], "detail": "Duplicate id"},
+    ]
+    db.refresh(foreign)
+    assert foreign.title != "Taken"
+
+
+def test_update_items_bulk_null_title(
+    client: TestClient, normal_user_token_headers: dict[str, str]
+) -> None:
+    response = client.post(
+        f"{settings.API_V1_STR}/items/bulk",
+        headers=normal_user_token_headers,
+        json=[{"title": "One"}, {"title": "Two"}],
+    )
+    first, second = response.json()["data"]
+    response = client.patch(
+        f"{settings.API_V1_STR}/items/bulk",
+        headers=normal_user_token_headers,
+        json=[{"id": first["id"], "title": "x"}, {"id": second["id"], "title": None}],
+    )
+    # Rejected before anything is written, the error points at the row
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"] == ["body", 1, "title"]
+    response = client.get(
+        f"{settings.API_V1_STR}/items/{first['id']}",
+        headers=normal_user_token_headers,
+    )
+    assert response.json()["title"] == "One"
+
+
+def test_delete_items_bulk(
+    client: TestClient, normal_user_token_headers: dict[str, str], db: Session
+) -> None:
+    response = client.post(
+        f"{settings.API_V1_STR}/items/bulk",
+        headers=normal_user_token_headers,
+        json=[{"title": "One"}, {"title": "Two"}],
+    )
+    ids = [item["id"] for item in response.json()["data"]]
+    foreign = create_random_item(db)
+    missing = uuid.uuid4()
+    response = client.request(
+        "DELETE",
+        f"{settings.API_V1_STR}/items/bulk",
+        headers=normal_user_token_headers,
+        json=[*ids, str(foreign.id), str(missing)],
+    )
+    assert response.status_code == 200
+    content = response.json()
+    assert sorted(content["ids"]) == sorted(ids)
+    assert content["errors"] == [
+        {"index": 2, "id": str(foreign.id), "detail": "Not enough permissions"},
+        {"index": 3, "id": str(missing), "detail": "Item not found"},
+    ]
+    db.refresh(foreign)
+    assert not db.exec(select(Item).where(col(Item.id).in_(ids))).first()
@@ -1,8 +1,12 @@
+import ipaddress
+import uuid
 from unittest.mock import patch
 
+from fastapi import Request
 from fastapi.testclient import TestClient
 from sqlmodel import Session
 
+from app.api.deps import client_ip, login_rate_limit
 from app.core.config import settings
 from app.core.security import verify_password
 from app.crud import create_user
@@ -33,6 +37,86 @@ def test_get_access_token_incorrect_password(client: TestClient) -> None:
     assert r.status_code == 400
 
 
+def test_get_access_token_hasher_busy(client: TestClient) -> None:
+    login_data = {
+        "username": settings.FIRST_SUPERUSER,
+        "password": settings.FIRST_SUPERUSER_PASSWORD,
+    }
+    with patch("app.core.config.settings.PASSWORD_HASH_MAX_PENDING", 0):
+        r = client.post(f"{settings.API_V1_STR}/login/access-token", data=login_data)
+    assert r.status_code == 503
+    assert r.headers["Retry-After"] == "1"
+
+
+def test_get_access_token_rate_limited(client: TestClient) -> None:
+    login_data = {"username": random_email(), "password": random_lower_string()}
+    # A bucket of its own, unaffected by earlier runs
+    with (
+        patch.object(settings, "RATE_LIMIT_ENABLED", True),
+        patch.object(login_rate_limit, "name", f"login-test-{uuid.uuid4()}"),
+        patch.object(login_rate_limit, "limit", 2),
+        patch("app.crud.authenticate_async", return_value=None) as authenticate,
+    ):
+        for _ in range(2):
+            r = client.post(
+                f"{settings.API_V1_STR}/login/access-token", data=login_data
+            )
+            assert r.status_code == 400
+        r = client.post(f"{settings.API_V1_STR}/login/access-token", data=login_data)
+    assert r.status_code == 429
+    assert int(r.headers["Retry-After"]) > 0
+    # Rejected before any password check
+    assert authenticate.call_count == 2
+
+
+def _forwarded_request(peer: str, forwarded_for: str) -> Request:
+    return Request(
+        {
+            "type": "http",
+            "client": (peer, 12345),
+            "headers": [(b"x-forwarded-for", forwarded_for.encode())],
+        }
+    )
+
+
+def test_client_ip_from_trusted_proxy() -> None:
+    with patch.object(
+        settings, "RATE_LIMIT_TRUSTED_PROXIES", [ipaddress.ip_network("10.0.0.0/8")]
+    ):
+        # The client forged the first entry, the proxies appended the rest
+        request = _forwarded_request("10.0.0.2", "1.1.1.1, 203.0.113.7, 10.0.0.5")
+        assert client_ip(request) == "203.0.113.7"
+        # Only proxies in the chain: the furthest one is the best guess
+        assert client_ip(_forwarded_request("10.0.0.2", "10.0.0.9")) == "10.0.0.9"
+        # The header of an untrusted peer is ignored
+        assert client_ip(_forwarded_request("198.51.100.1", "1.1.1.1")) == (
+            "198.51.100.1"
+        )
+    assert client_ip(_forwarded_request("10.0.0.2", "203.0.113.7")) == "10.0.0.2"
+
+
+def test_get_access_token_rate_limit_ignores_untrusted_forwarded_for(
+    client: TestClient,
+) -> None:
+    login_data = {"username": random_email(), "password": random_lower_string()}
+    with (
+        patch.object(settings, "RATE_LIMIT_ENABLED", True),
+        patch.object(login_rate_limit, "name", f"login-test-{uuid.uuid4()}"),
+        patch.object(login_rate_limit, "limit", 2),
+        patch("app.crud.authenticate_async", return_value=None),
+    ):
+        # A new forged address per request shares the limit of the real peer
+        statuses = [
+            client.post(
+                f"{settings.API_V1_STR}/login/access-token",
+                data=login_data,
+                headers={"X-Forwarded-For": f"203.0.113.{i}"},
+            ).status_code
+            for i in range(3)
+        ]
+    assert statuses == [400, 400, 429]
+
+
 def test_use_access_token(
     client: TestClient, superuser_token_headers: dict[str, str]
 ) -> None:
@@ -1,13 +1,18 @@
+import csv
+import io
+import json
 import uuid
 from unittest.mock import patch
 
 from fastapi.testclient import TestClient
-from sqlmodel import Session, select
+from kombu.exceptions import OperationalError
+from sqlmodel import Session, func, select
 
 from app import crud
 from app.core.config import settings
 from app.core.security import verify_password
 from app.models import User, UserCreate
+from tests.utils.user import user_authentication_headers
 from tests.utils.utils import random_email, random_lower_string
 
 
@@ -168,6 +173,74 @@ def test_retrieve_users(
         assert "email" in item
 
 
+def test_export_users(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    email = random_email()
+    crud.create_user(
+        session=db, user_create=UserCreate(email=email, password=random_lower_string())
+    )
+    count = db.exec(select(func.count()).select_from(User)).one()
+
+    with patch.object(settings, "EXPORT_BATCH_SIZE", 2):
+        r = client.get(
+            f"{settings.API_V1_STR}/users/export", headers=superuser_token_headers
+        )
+    assert r.status_code == 200
+    assert r.headers["content-type"] == "application/x-ndjson"
+    users = [json.loads(line) for line in r.text.splitlines()]
+    assert len(users) == count
+    assert [user["id"] for user in users] == sorted(user["id"] for user in users)
+    assert email in {user["email"] for user in users}
+    assert "hashed_password" not in users[0]
+
+    r = client.get(
+        f"{settings.API_V1_STR}/users/export",
+        headers=superuser_token_headers,
+        params={"format": "csv"},
+    )
+    assert r.status_code == 200
+    assert r.headers["content-disposition"] == 'attachment; filename="users.csv"'
+    rows = list(csv.DictReader(io.StringIO(r.text)))
+    assert len(rows) == count
+    assert email in {row["email"] for row in rows}
+
+
+def test_export_users_normal_user(
+    client: TestClient, normal_user_token_headers: dict[str, str]
+) -> None:
+    r = client.get(
+        f"{settings.API_V1_STR}/users/export", headers=normal_user_token_headers
+    )
+    assert r.status_code == 403
+
+
+def test_retrieve_users_cursor(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    for _ in range(3):
+        user_in = UserCreate(email=random_email(), password=random_lower_string())
+        crud.create_user(session=db, user_create=user_in)
+
+    seen: list[uuid.UUID] = []
+    params: dict[str, str | int] = {"limit": 2}
+    while True:
+        r = client.get(
+            f"{settings.API_V1_STR}/users/",
+            headers=superuser_token_headers,
+            params=params,
+        )
+        assert r.status_code == 200
+        page = r.json()
+        seen.extend(uuid.UUID(user["id"]) for user in page["data"])
+        if not page["next_cursor"]:
+            break
+        params = {"limit": 2, "cursor": page["next_cursor"]}
+
+    assert seen == sorted(seen)
+    assert len(seen) == len(set(seen)) == page["count"]
+
+
 def test_update_user_me(
     client: TestClient, normal_user_token_headers: dict[str, str], db: Session
 ) -> None:
@@ -413,6 +486,48 @@ def test_delete_user_me(client: TestClient, db: Session) -> None:
     assert user_db is None
 
 
+def test_delete_user_me_schedules_deletion(client: TestClient, db: Session) -> None:
+    username = random_email()
+    password = random_lower_string()
+    user = crud.create_user(
+        session=db, user_create=UserCreate(email=username, password=password)
+    )
+    headers = user_authentication_headers(
+        client=client, email=username, password=password
+    )
+
+    with patch("app.api.routes.users.delete_user_task.delay") as delay:
+        r = client.delete(f"{settings.API_V1_STR}/users/me", headers=headers)
+    assert r.status_code == 200
+    delay.assert_called_once_with(str(user.id))
+    # Deactivated right away, the task deletes the row and the items later
+    db.refresh(user)
+    assert not user.is_active
+    assert user.deleted_at is not None
+    r = client.get(f"{settings.API_V1_STR}/users/me", headers=headers)
+    assert r.status_code == 400
+
+
+def test_delete_user_enqueue_failure(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    user = crud.create_user(
+        session=db,
+        user_create=UserCreate(email=random_email(), password=random_lower_string()),
+    )
+    with patch(
+        "app.api.routes.users.delete_user_task.delay",
+        side_effect=OperationalError("broker down"),
+    ):
+        r = client.delete(
+            f"{settings.API_V1_STR}/users/{user.id}", headers=superuser_token_headers
+        )
+    assert r.status_code == 503
+    db.refresh(user)
+    assert user.is_active
+    assert user.deleted_at is None
+
+
 def test_delete_user_me_as_superuser(
     client: TestClient, superuser_token_headers: dict[str, str]
 ) -> None:
@@ -484,3 +599,28 @@ def test_delete_user_without_privileges(
     )
     assert r.status_code == 403
     assert r.json()["detail"] == "The user doesn't have enough privileges"
+
+
+def test_deactivated_user_token_rejected(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    username = random_email()
+    password = random_lower_string()
+    user_in = UserCreate(email=username, password=password)
+    user = crud.create_user(session=db, user_create=user_in)
+    headers = user_authentication_headers(
+        client=client, email=username, password=password
+    )
+    # Warm the cached principal
+    r = client.get(f"{settings.API_V1_STR}/users/me", headers=headers)
+    assert r.status_code == 200
+
+    r = client.patch(
+        f"{settings.API_V1_STR}/users/{user.id}",
+        headers=superuser_token_headers,
+        json={"is_active": False},
+    )
+    assert r.status_code == 200
+    r = client.get(f"{settings.API_V1_STR}/users/me", headers=headers)
+    assert r.status_code == 400
+    assert r.json()["detail"] == "Inactive user"
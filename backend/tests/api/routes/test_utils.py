@@ -0,0 +1,65 @@
+from unittest.mock import AsyncMock, patch
+
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.core.health import DEPENDENCIES, health_checker
+
+
+def test_db_pool_status(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    r = client.get(
+        f"{settings.API_V1_STR}/utils/db-pool/", headers=superuser_token_headers
+    )
+    assert r.status_code == 200
+    content = r.json()
+    for name in ("sync", "async"):
+        assert content[name]["size"] == settings.POSTGRES_POOL_SIZE
+        assert content[name]["in_use"] >= 0
+        assert "checkout_wait_seconds_max" in content[name]
+    # The request itself went through the async pool
+    assert content["async"]["checkouts"] > 0
+
+
+def test_db_pool_status_normal_user(
+    client: TestClient, normal_user_token_headers: dict[str, str]
+) -> None:
+    r = client.get(
+        f"{settings.API_V1_STR}/utils/db-pool/", headers=normal_user_token_headers
+    )
+    assert r.status_code == 403
+
+
+def test_liveness(client: TestClient) -> None:
+    r = client.get(f"{settings.API_V1_STR}/utils/health/live/")
+    assert r.status_code == 200
+    assert r.json() == {"message": "OK"}
+
+
+def test_readiness(client: TestClient) -> None:
+    health_checker.clear()
+    with patch.object(DEPENDENCIES["qdrant"], "probe", AsyncMock()):
+        r = client.get(f"{settings.API_V1_STR}/utils/health/ready/")
+    assert r.status_code == 200
+    content = r.json()
+    assert content["status"] == "ok"
+    assert content["dependencies"]["postgres"]["status"] == "ok"
+    health_checker.clear()
+
+
+def test_readiness_critical_dependency_down(client: TestClient) -> None:
+    health_checker.clear()
+    with patch.object(
+        DEPENDENCIES["postgres"],
+        "probe",
+        AsyncMock(side_effect=ConnectionError("down")),
+    ):
+        r = client.get(f"{settings.API_V1_STR}/utils/health/ready/")
+    assert r.status_code == 503
+    content = r.json()
+    assert content["status"] == "unavailable"
+    assert content["dependencies"]["postgres"]["status"] == "error"
+    # The message is logged, not returned to anonymous callers
+    assert "error" not in content["dependencies"]["postgres"]
+    health_checker.clear()
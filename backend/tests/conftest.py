@@ -1,9 +1,12 @@
-from collections.abc import Generator
+from collections.abc import AsyncGenerator, Generator
+from unittest.mock import patch
 
 import pytest
 from fastapi.testclient import TestClient
 from sqlmodel import Session, delete
 
+from app.core import redis_client
+from app.core.celery_app import celery_app
 from app.core.config import settings
 from app.core.db import engine, init_db
 from app.main import app
@@ -24,6 +27,33 @@ def db() -> Generator[Session, None, None]:
         session.commit()
 
 
+@pytest.fixture(scope="session", autouse=True)
+def disable_rate_limits() -> Generator[None, None, None]:
+    # Every test logs in from the same address, tests of the limiter enable it
+    with patch.object(settings, "RATE_LIMIT_ENABLED", False):
+        yield
+
+
+@pytest.fixture(scope="session", autouse=True)
+def eager_celery_tasks() -> Generator[None, None, None]:
+    # Run tasks inline instead of publishing them to a broker
+    celery_app.conf.task_always_eager = True
+    yield
+    celery_app.conf.task_always_eager = False
+
+
+@pytest.fixture
+def anyio_backend() -> str:
+    return "asyncio"
+
+
+@pytest.fixture
+async def redis_connection() -> AsyncGenerator[None, None]:
+    # The shared Redis client is bound to the event loop of each async test
+    yield
+    await redis_client.close()
+
+
 @pytest.fixture(scope="module")
 def client() -> Generator[TestClient, None, None]:
     with TestClient(app) as c:
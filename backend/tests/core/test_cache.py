@@ -0,0 +1,69 @@
+import json
+import uuid
+from unittest.mock import patch
+
+import pytest
+
+from app.core import cache
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.redis_client import get_redis
+
+
+def test_ttl_cache_get_set() -> None:
+    cache: TTLCache[str, int] = TTLCache(maxsize=10, ttl=60)
+    assert cache.get("a") is None
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    cache.pop("a")
+    assert cache.get("a") is None
+
+
+def test_ttl_cache_expires() -> None:
+    cache: TTLCache[str, int] = TTLCache(maxsize=10, ttl=60)
+    with patch("app.core.cache.time.monotonic", return_value=1000.0):
+        cache.set("a", 1)
+        cache.set("b", 2, ttl=5)
+    with patch("app.core.cache.time.monotonic", return_value=1010.0):
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+    with patch("app.core.cache.time.monotonic", return_value=1061.0):
+        assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_ttl_cache_evicts_least_recently_used() -> None:
+    cache: TTLCache[str, int] = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures("redis_connection")
+async def test_get_user_with_redis_keeps_local_copy_briefly() -> None:
+    user_id = str(uuid.uuid4())
+    data = {"id": user_id, "email": "cached@example.com"}
+    await get_redis().setex(cache._user_key(user_id), 60, json.dumps(data))
+    with (
+        patch.object(settings, "USER_CACHE_REDIS", True),
+        patch.object(settings, "USER_CACHE_LOCAL_TTL_SECONDS", 5),
+        patch("app.core.cache.time.monotonic", return_value=1000.0),
+    ):
+        assert await cache.get_user(user_id) == data
+    # Another worker deactivates the user and clears the Redis entry
+    await get_redis().delete(cache._user_key(user_id))
+    with (
+        patch.object(settings, "USER_CACHE_REDIS", True),
+        patch("app.core.cache.time.monotonic", return_value=1004.0),
+    ):
+        assert await cache.get_user(user_id) == data
+    with (
+        patch.object(settings, "USER_CACHE_REDIS", True),
+        patch("app.core.cache.time.monotonic", return_value=1006.0),
+    ):
+        assert await cache.get_user(user_id) is None
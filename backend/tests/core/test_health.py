@@ -0,0 +1,101 @@
+import asyncio
+from collections.abc import Generator
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from prometheus_client import REGISTRY
+
+from app.core import health
+from app.core.config import settings
+from app.core.health import DEPENDENCIES, health_checker
+
+
+@pytest.fixture(autouse=True)
+def clear_health_cache() -> Generator[None, None, None]:
+    health_checker.clear()
+    # Qdrant is not part of the test stack
+    with patch.object(DEPENDENCIES["qdrant"], "probe", AsyncMock()):
+        yield
+    health_checker.clear()
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures("redis_connection")
+async def test_check_dependencies() -> None:
+    labels = {"dependency": "postgres", "status": "ok"}
+    count = REGISTRY.get_sample_value("health_probe_duration_seconds_count", labels)
+    report = await health.check_dependencies()
+    assert report.status == "ok"
+    for name in ("postgres", "redis", "broker"):
+        assert report.dependencies[name].status == "ok"
+        assert report.dependencies[name].critical
+        assert report.dependencies[name].latency_ms is not None
+    # Not configured in the test settings
+    assert report.dependencies["smtp"].status == "disabled"
+    assert (
+        REGISTRY.get_sample_value("health_probe_duration_seconds_count", labels)
+        == (count or 0) + 1
+    )
+
+
+@pytest.mark.anyio
+async def test_critical_failure_is_unavailable() -> None:
+    probe = AsyncMock(side_effect=ConnectionError("refused"))
+    with (
+        patch.object(DEPENDENCIES["postgres"], "probe", AsyncMock()),
+        patch.object(DEPENDENCIES["redis"], "probe", probe),
+        patch.object(DEPENDENCIES["broker"], "probe", AsyncMock()),
+    ):
+        report = await health.check_dependencies()
+    assert report.status == "unavailable"
+    assert report.dependencies["redis"].status == "error"
+    assert report.dependencies["redis"].error == "refused"
+
+
+@pytest.mark.anyio
+async def test_non_critical_failure_is_degraded() -> None:
+    with (
+        patch.object(DEPENDENCIES["postgres"], "probe", AsyncMock()),
+        patch.object(DEPENDENCIES["redis"], "probe", AsyncMock()),
+        patch.object(DEPENDENCIES["broker"], "probe", AsyncMock()),
+        patch.object(DEPENDENCIES["qdrant"], "probe", AsyncMock(side_effect=OSError)),
+    ):
+        report = await health.check_dependencies()
+    assert report.status == "degraded"
+    assert report.dependencies["qdrant"].error == "OSError"
+
+
+@pytest.mark.anyio
+async def test_probe_timeout() -> None:
+    async def hang() -> None:
+        await asyncio.sleep(10)
+
+    with (
+        patch.object(settings, "HEALTH_CHECK_TIMEOUT_SECONDS", 0.01),
+        patch.object(DEPENDENCIES["postgres"], "probe", hang),
+    ):
+        result = await health.check_dependency("postgres")
+    assert result.status == "error"
+    assert result.error == "Timed out"
+    assert result.latency_ms is not None and result.latency_ms < 1000
+
+
+@pytest.mark.anyio
+async def test_report_is_cached_and_shared() -> None:
+    probe = AsyncMock()
+    with (
+        patch.object(DEPENDENCIES["postgres"], "probe", probe),
+        patch.object(DEPENDENCIES["redis"], "probe", AsyncMock()),
+        patch.object(DEPENDENCIES["broker"], "probe", AsyncMock()),
+    ):
+        # Concurrent callers wait for the one run of the probes
+        reports = await asyncio.gather(*(health_checker.check() for _ in range(5)))
+        assert probe.await_count == 1
+        assert all(report is reports[0] for report in reports)
+
+        await health_checker.check()
+        assert probe.await_count == 1
+
+        with patch.object(settings, "HEALTH_CHECK_CACHE_SECONDS", 0):
+            await health_checker.check()
+        assert probe.await_count == 2
@@ -0,0 +1,54 @@
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from app.core import http_client
+from app.core.config import settings
+from app.services import wechat
+
+
+@pytest.mark.anyio
+async def test_http_client_is_shared() -> None:
+    client = http_client.get_http_client()
+    assert http_client.get_http_client() is client
+    await http_client.close()
+    assert client.is_closed
+    reopened = http_client.get_http_client()
+    assert reopened is not client
+    await http_client.close()
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures("redis_connection")
+async def test_wechat_login_uses_shared_client() -> None:
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/sns/oauth2/access_token":
+            return httpx.Response(
+                200,
+                json={
+                    "access_token": "token",
+                    "expires_in": 7200,
+                    "refresh_token": "refresh",
+                    "openid": "openid",
+                    "scope": "snsapi_userinfo",
+                    "unionid": "unionid",
+                },
+            )
+        return httpx.Response(
+            200, json={"openid": "openid", "nickname": "nick", "headimgurl": "url"}
+        )
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    with (
+        patch.object(settings, "WECHAT_APP_ID", "app-id"),
+        patch.object(settings, "WECHAT_APP_SECRET", "secret"),
+        patch("app.services.wechat.get_http_client", return_value=client),
+    ):
+        user_info = await wechat.wechat_login("code")
+    # Both calls went through the shared client, which stays open
+    assert not client.is_closed
+    assert user_info.openid == "openid"
+    assert user_info.unionid == "unionid"
+    assert user_info.nickname == "nick"
+    await client.aclose()
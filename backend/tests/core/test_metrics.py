@@ -0,0 +1,85 @@
+import uuid
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from app.core.config import settings
+from app.core.redis_client import get_redis
+from app.tasks.users import delete_user_task
+
+
+def sample(name: str, labels: dict[str, str]) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_http_request_metrics(client: TestClient) -> None:
+    labels = {"method": "GET", "route": "utils-liveness", "status": "200"}
+    before = sample("http_request_duration_seconds_count", labels)
+    client.get(f"{settings.API_V1_STR}/utils/health/live/")
+    assert sample("http_request_duration_seconds_count", labels) == before + 1
+    assert sample("http_requests_in_progress", {"method": "GET"}) == 0
+
+
+def test_unmatched_routes_share_one_series(client: TestClient) -> None:
+    labels = {"method": "GET", "route": "unmatched", "status": "404"}
+    before = sample("http_request_duration_seconds_count", labels)
+    client.get(f"/{uuid.uuid4()}")
+    client.get(f"/{uuid.uuid4()}")
+    assert sample("http_request_duration_seconds_count", labels) == before + 2
+
+
+def test_db_query_metrics(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    labels = {"engine": "async", "operation": "SELECT"}
+    before = sample("db_query_duration_seconds_count", labels)
+    client.get(f"{settings.API_V1_STR}/items/", headers=superuser_token_headers)
+    assert sample("db_query_duration_seconds_count", labels) > before
+
+
+def test_db_pool_metrics(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    labels = {"engine": "async"}
+    before = sample("db_pool_checkout_wait_seconds_count", labels)
+    client.get(f"{settings.API_V1_STR}/items/", headers=superuser_token_headers)
+    assert sample("db_pool_checkout_wait_seconds_count", labels) > before
+    assert sample("db_pool_size", labels) == settings.POSTGRES_POOL_SIZE
+    # Every connection went back to the pool with the response
+    assert sample("db_pool_connections_in_use", labels) == 0
+    assert sample("db_pool_overflow", labels) == 0
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures("redis_connection")
+async def test_redis_command_metrics() -> None:
+    before = sample("redis_command_duration_seconds_count", {"command": "PING"})
+    await get_redis().ping()
+    assert sample("redis_command_duration_seconds_count", {"command": "PING"}) == (
+        before + 1
+    )
+
+
+def test_celery_task_metrics() -> None:
+    labels = {"task": delete_user_task.name, "state": "SUCCESS"}
+    before = sample("celery_task_duration_seconds_count", labels)
+    delete_user_task.delay(str(uuid.uuid4())).get()
+    assert sample("celery_task_duration_seconds_count", labels) == before + 1
+
+
+def test_metrics_endpoint(client: TestClient) -> None:
+    client.get(f"{settings.API_V1_STR}/utils/health/live/")
+    r = client.get("/metrics")
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/plain")
+    assert 'route="utils-liveness"' in r.text
+    assert 'celery_queue_length{queue="sms"}' in r.text
+
+
+def test_metrics_endpoint_token(client: TestClient) -> None:
+    with patch.object(settings, "METRICS_TOKEN", "secret"):
+        assert client.get("/metrics").status_code == 401
+        r = client.get("/metrics", headers={"Authorization": "Bearer secret"})
+        assert r.status_code == 200
@@ -0,0 +1,76 @@
+import uuid
+from unittest.mock import patch
+
+import pytest
+import redis
+
+from app.core import rate_limit
+from app.core.rate_limit import LocalRateLimiter
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures("redis_connection")
+async def test_token_bucket_allows_burst_then_limits() -> None:
+    key = uuid.uuid4().hex
+    for _ in range(3):
+        assert (
+            await rate_limit.hit(key, limit=3, period=60, algorithm="token_bucket") == 0
+        )
+    retry_after = await rate_limit.hit(
+        key, limit=3, period=60, algorithm="token_bucket"
+    )
+    # One token comes back every 20 seconds
+    assert 0 < retry_after <= 20
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures("redis_connection")
+async def test_sliding_window_limits() -> None:
+    key = uuid.uuid4().hex
+    for _ in range(3):
+        assert (
+            await rate_limit.hit(key, limit=3, period=60, algorithm="sliding_window")
+            == 0
+        )
+    retry_after = await rate_limit.hit(
+        key, limit=3, period=60, algorithm="sliding_window"
+    )
+    assert 0 < retry_after <= 60
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures("redis_connection")
+async def test_falls_back_to_local_limiter() -> None:
+    key = uuid.uuid4().hex
+    with patch(
+        "app.core.rate_limit.token_bucket_script",
+        side_effect=redis.ConnectionError("down"),
+    ):
+        assert (
+            await rate_limit.hit(key, limit=1, period=60, algorithm="token_bucket") == 0
+        )
+        assert (
+            await rate_limit.hit(key, limit=1, period=60, algorithm="token_bucket") > 0
+        )
+
+
+def test_local_token_bucket_refills() -> None:
+    limiter = LocalRateLimiter()
+    with patch("app.core.rate_limit.time.monotonic", return_value=1000.0):
+        assert limiter.token_bucket("a", limit=2, period_ms=60_000) == 0
+        assert limiter.token_bucket("a", limit=2, period_ms=60_000) == 0
+        assert limiter.token_bucket("a", limit=2, period_ms=60_000) == 30_000
+    with patch("app.core.rate_limit.time.monotonic", return_value=1030.0):
+        assert limiter.token_bucket("a", limit=2, period_ms=60_000) == 0
+        assert limiter.token_bucket("a", limit=2, period_ms=60_000) > 0
+
+
+def test_local_sliding_window() -> None:
+    limiter = LocalRateLimiter()
+    with patch("app.core.rate_limit.time.monotonic", return_value=1000.0):
+        assert limiter.sliding_window("a", limit=2, period_ms=60_000) == 0
+    with patch("app.core.rate_limit.time.monotonic", return_value=1010.0):
+        assert limiter.sliding_window("a", limit=2, period_ms=60_000) == 0
+        assert limiter.sliding_window("a", limit=2, period_ms=60_000) == 50_000
+    with patch("app.core.rate_limit.time.monotonic", return_value=1060.5):
+        assert limiter.sliding_window("a", limit=2, period_ms=60_000) == 0
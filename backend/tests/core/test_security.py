@@ -0,0 +1,43 @@
+import asyncio
+import os
+from datetime import timedelta
+
+import jwt
+import pytest
+
+from app.core import security
+
+
+def test_decode_access_token_is_memoized() -> None:
+    token = security.create_access_token("subject", expires_delta=timedelta(hours=1))
+    hits = security.token_cache.hits
+    assert security.decode_access_token(token)["sub"] == "subject"
+    assert security.decode_access_token(token)["sub"] == "subject"
+    assert security.token_cache.hits == hits + 1
+
+
+def test_decode_access_token_rejects_tampered_token() -> None:
+    token = security.create_access_token("subject", expires_delta=timedelta(hours=1))
+    security.decode_access_token(token)
+    with pytest.raises(jwt.InvalidTokenError):
+        security.decode_access_token(token[:-2] + "xx")
+
+
+def test_decode_access_token_rejects_expired_token() -> None:
+    token = security.create_access_token("subject", expires_delta=timedelta(hours=-1))
+    with pytest.raises(jwt.ExpiredSignatureError):
+        security.decode_access_token(token)
+
+
+def test_run_hasher_recovers_from_broken_pool(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(security.settings, "PASSWORD_HASH_WORKERS", 1)
+    security.shutdown_password_hasher()
+    broken = security._get_hash_executor()
+    # Kill the pool's only process, as the OOM killer would
+    broken.submit(os._exit, 1)
+    try:
+        hashed = asyncio.run(security.get_password_hash_async("changethis"))
+        assert security.verify_password("changethis", hashed)
+        assert security._hash_executor is not broken
+    finally:
+        security.shutdown_password_hasher()
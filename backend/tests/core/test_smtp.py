@@ -0,0 +1,57 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.core.smtp import SMTPPool
+
+
+@patch("app.core.smtp.SMTPBackend")
+def test_smtp_pool_reuses_connection(backend_cls: MagicMock) -> None:
+    pool = SMTPPool(size=2, max_idle=60)
+    with pool.connection() as first:
+        pass
+    with pool.connection() as second:
+        pass
+    assert first is second
+    assert backend_cls.call_count == 1
+    first.close.assert_not_called()
+
+
+@patch("app.core.smtp.SMTPBackend")
+def test_smtp_pool_drops_idle_connection(backend_cls: MagicMock) -> None:
+    backend_cls.side_effect = lambda **_: MagicMock()
+    pool = SMTPPool(size=2, max_idle=60)
+    with patch("app.core.smtp.time.monotonic", return_value=1000.0):
+        with pool.connection() as first:
+            pass
+    with patch("app.core.smtp.time.monotonic", return_value=1061.0):
+        with pool.connection() as second:
+            pass
+    assert first is not second
+    first.close.assert_called_once()
+
+
+@patch("app.core.smtp.SMTPBackend")
+def test_smtp_pool_closes_connection_on_error(backend_cls: MagicMock) -> None:
+    backend_cls.side_effect = lambda **_: MagicMock()
+    pool = SMTPPool(size=2, max_idle=60)
+    with pytest.raises(OSError):
+        with pool.connection() as first:
+            raise OSError
+    first.close.assert_called_once()
+    with pool.connection() as second:
+        pass
+    assert first is not second
+
+
+@patch("app.core.smtp.SMTPBackend")
+def test_smtp_pool_size(backend_cls: MagicMock) -> None:
+    backend_cls.side_effect = lambda **_: MagicMock()
+    pool = SMTPPool(size=1, max_idle=60)
+    with pool.connection() as first, pool.connection() as second:
+        pass
+    # second is returned first and takes the only idle slot
+    first.close.assert_called_once()
+    second.close.assert_not_called()
+    pool.close()
+    second.close.assert_called_once()
@@ -0,0 +1,85 @@
+import uuid
+from collections.abc import Generator
+from typing import Any
+
+import pytest
+from sqlalchemy import Connection, delete, text
+from sqlmodel import col, func, select
+
+from app.core.db import engine
+from app.models import Item, User
+
+OWNER_ID = uuid.uuid4()
+
+
+@pytest.fixture
+def connection() -> Generator[Connection, None, None]:
+    with engine.connect() as connection, connection.begin() as transaction:
+        # The test tables are tiny, a sequential scan would always win
+        connection.execute(text("SET LOCAL enable_seqscan = off"))
+        yield connection
+        transaction.rollback()
+
+
+def explain(connection: Connection, statement: Any) -> str:
+    compiled = statement.compile(engine, compile_kwargs={"literal_binds": True})
+    rows = connection.execute(text(f"EXPLAIN {compiled}")).scalars()
+    return "\n".join(rows)
+
+
+@pytest.mark.parametrize(
+    ("statement", "index"),
+    [
+        pytest.param(
+            select(Item, func.count().over())
+            .where(col(Item.owner_id) == OWNER_ID)
+            .order_by(col(Item.id))
+            .limit(100),
+            "ix_item_owner_id_id",
+            id="items page",
+        ),
+        pytest.param(
+            select(Item)
+            .where(col(Item.owner_id) == OWNER_ID, col(Item.id) > uuid.uuid4())
+            .order_by(col(Item.id))
+            .limit(100),
+            "ix_item_owner_id_id",
+            id="items keyset page",
+        ),
+        pytest.param(
+            select(func.count())
+            .select_from(Item)
+            .where(col(Item.owner_id) == OWNER_ID),
+            "ix_item_owner_id_id",
+            id="items count",
+        ),
+        pytest.param(
+            delete(Item).where(col(Item.owner_id) == OWNER_ID),
+            "ix_item_owner_id_id",
+            id="delete user items",
+        ),
+        pytest.param(
+            select(User).where(User.phone == "13800138000"),
+            "ix_user_phone",
+            id="user by phone",
+        ),
+        pytest.param(
+            select(User).where(User.wechat_unionid == "unionid"),
+            "ix_user_wechat_unionid",
+            id="user by unionid",
+        ),
+        pytest.param(
+            select(User).where(User.wechat_openid == "openid"),
+            "ix_user_wechat_openid",
+            id="user by openid",
+        ),
+    ],
+)
+def test_hot_queries_use_index(
+    connection: Connection, statement: Any, index: str
+) -> None:
+    plan = explain(connection, statement)
+    assert (
+        f"Index Scan using {index}" in plan or f"Index Only Scan using {index}" in plan
+    ), plan
+    assert "Seq Scan" not in plan, plan
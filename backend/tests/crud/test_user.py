@@ -1,9 +1,16 @@
+from unittest.mock import patch
+
+import pytest
 from fastapi.encoders import jsonable_encoder
+from passlib.context import CryptContext
 from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app import crud
-from app.core.security import verify_password
+from app.core.db import async_engine
+from app.core.security import pwd_context, verify_password
 from app.models import User, UserCreate, UserUpdate
+from app.services.wechat import WechatUserInfo
 from tests.utils.utils import random_email, random_lower_string
 
 
@@ -26,6 +33,25 @@ def test_authenticate_user(db: Session) -> None:
     assert user.email == authenticated_user.email
 
 
+def test_authenticate_user_upgrades_outdated_hash(db: Session) -> None:
+    email = random_email()
+    password = random_lower_string()
+    user_in = UserCreate(email=email, password=password)
+    user = crud.create_user(session=db, user_create=user_in)
+    outdated_context = CryptContext(
+        schemes=["argon2"], argon2__time_cost=1, argon2__memory_cost=1024
+    )
+    user.hashed_password = outdated_context.hash(password)
+    db.add(user)
+    db.commit()
+
+    authenticated_user = crud.authenticate(session=db, email=email, password=password)
+    assert authenticated_user
+    db.refresh(user)
+    assert not pwd_context.needs_update(user.hashed_password)
+    assert verify_password(password, user.hashed_password)
+
+
 def test_not_authenticate_user(db: Session) -> None:
     email = random_email()
     password = random_lower_string()
@@ -89,3 +115,87 @@ def test_update_user(db: Session) -> None:
     assert user_2
     assert user.email == user_2.email
     assert verify_password(new_password, user_2.hashed_password)
+
+
+def test_upsert_user_by_wechat_keeps_nickname(db: Session) -> None:
+    openid = random_lower_string()
+    user = crud.create_user_by_wechat(
+        session=db, wechat_info=WechatUserInfo(openid=openid, nickname="old")
+    )
+    wechat_info = WechatUserInfo(
+        openid=openid, unionid=random_lower_string(), nickname="new", avatar="url"
+    )
+    updated = crud.upsert_user_by_wechat(session=db, wechat_info=wechat_info)
+    assert updated.id == user.id
+    assert updated.wechat_unionid == wechat_info.unionid
+    # An existing nickname is kept, a missing avatar is filled in
+    assert updated.nickname == "old"
+    assert updated.avatar == "url"
+
+
+def test_upsert_user_by_wechat(db: Session) -> None:
+    openid = random_lower_string()
+    wechat_info = WechatUserInfo(openid=openid, nickname="old")
+    user = crud.upsert_user_by_wechat(session=db, wechat_info=wechat_info)
+    assert user.wechat_openid == openid
+    assert user.nickname == "old"
+    assert user.hashed_password == ""
+    # A repeat login with the same details resolves the same user without writes
+    with patch("app.crud.invalidate_user") as invalidate:
+        same = crud.upsert_user_by_wechat(session=db, wechat_info=wechat_info)
+    assert same.id == user.id
+    invalidate.assert_not_called()
+
+
+def test_upsert_user_by_wechat_matches_unionid(db: Session) -> None:
+    unionid = random_lower_string()
+    user = crud.create_user_by_wechat(
+        session=db,
+        wechat_info=WechatUserInfo(openid=random_lower_string(), unionid=unionid),
+    )
+    # Another app of the same developer reports a new openid for the user
+    wechat_info = WechatUserInfo(
+        openid=random_lower_string(), unionid=unionid, nickname="new", avatar="url"
+    )
+    with patch("app.crud.invalidate_user") as invalidate:
+        updated = crud.upsert_user_by_wechat(session=db, wechat_info=wechat_info)
+    assert updated.id == user.id
+    assert updated.wechat_openid == wechat_info.openid
+    assert updated.nickname == "new"
+    assert updated.avatar == "url"
+    invalidate.assert_called_once_with(user.id)
+
+
+@pytest.mark.anyio
+async def test_upsert_user_by_wechat_async() -> None:
+    wechat_info = WechatUserInfo(openid=random_lower_string(), nickname="nick")
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        with patch("app.crud.invalidate_user_async") as invalidate:
+            user = await crud.upsert_user_by_wechat_async(
+                session=session, wechat_info=wechat_info
+            )
+            same = await crud.upsert_user_by_wechat_async(
+                session=session, wechat_info=wechat_info
+            )
+    await async_engine.dispose()
+    assert same.id == user.id
+    assert user.nickname == "nick"
+    # Only the insert wrote the row
+    invalidate.assert_awaited_once_with(user.id)
+
+
+@pytest.mark.anyio
+async def test_create_and_authenticate_user_async() -> None:
+    email = random_email()
+    password = random_lower_string()
+    user_in = UserCreate(email=email, password=password)
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        user = await crud.create_user_async(session=session, user_create=user_in)
+        authenticated_user = await crud.authenticate_async(
+            session=session, email=email, password=password
+        )
+    # Do not leak connections bound to this test's event loop
+    await async_engine.dispose()
+    assert user.email == email
+    assert authenticated_user
+    assert authenticated_user.id == user.id
@@ -0,0 +1,138 @@
+import json
+import uuid
+from collections.abc import Generator
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+import pytest
+import redis
+from sqlalchemy import text
+from sqlmodel import Session, func, select
+
+from app import crud
+from app.core.celery_app import celery_app
+from app.core.config import settings
+from app.core.db import engine
+from app.models import Item, ItemCreate, User
+from app.services.sms import SMS_CODE_PREFIX, SMS_RATE_LIMIT_PREFIX
+from app.tasks.maintenance import cleanup_expired_data, health_check_task
+from tests.utils.user import create_random_user
+
+
+@pytest.fixture
+def redis_client() -> Generator[redis.Redis, None, None]:
+    with redis.Redis.from_url(settings.REDIS_URL) as client:
+        yield client
+
+
+def create_deleted_user(db: Session, deleted_ago: timedelta, items: int) -> User:
+    user = create_random_user(db)
+    for i in range(items):
+        crud.create_item(
+            session=db, item_in=ItemCreate(title=f"item {i}"), owner_id=user.id
+        )
+    user.is_active = False
+    user.deleted_at = datetime.now(timezone.utc) - deleted_ago
+    db.add(user)
+    db.commit()
+    return user
+
+
+def count_items(db: Session, owner_id: uuid.UUID) -> int:
+    return db.exec(
+        select(func.count()).select_from(Item).where(Item.owner_id == owner_id)
+    ).one()
+
+
+def test_cleanup_removes_sms_keys_without_ttl(redis_client: redis.Redis) -> None:
+    phone = uuid.uuid4().hex
+    orphaned_code = f"{SMS_CODE_PREFIX}{phone}"
+    orphaned_rate = f"{SMS_RATE_LIMIT_PREFIX}{phone}"
+    live_code = f"{SMS_CODE_PREFIX}{phone}-live"
+    redis_client.hset(orphaned_code, "code", "123456")
+    redis_client.set(orphaned_rate, "1")
+    redis_client.set(live_code, "1", ex=300)
+
+    result = cleanup_expired_data.delay().get()
+
+    assert result["status"] == "completed"
+    assert result["categories"]["sms_codes"]["cleaned"] >= 1
+    assert result["categories"]["sms_rate_limits"]["cleaned"] >= 1
+    assert not redis_client.exists(orphaned_code, orphaned_rate)
+    assert redis_client.ttl(live_code) > 0
+    redis_client.delete(live_code)
+
+
+def test_cleanup_removes_stale_task_results(redis_client: redis.Redis) -> None:
+    backend = celery_app.backend
+    now = datetime.now(timezone.utc)
+    stale = backend.get_key_for_task(str(uuid.uuid4()))
+    recent = backend.get_key_for_task(str(uuid.uuid4()))
+    expired_at = now - timedelta(seconds=backend.expires + 60)
+    redis_client.set(stale, json.dumps({"date_done": expired_at.isoformat()}))
+    redis_client.set(recent, json.dumps({"date_done": now.isoformat()}))
+
+    result = cleanup_expired_data.delay().get()
+
+    assert result["categories"]["task_results"]["cleaned"] >= 1
+    assert not redis_client.exists(stale)
+    # Kept, with the time it has left to live
+    assert 0 < redis_client.ttl(recent) <= backend.expires
+    redis_client.delete(recent)
+
+
+def test_cleanup_finishes_user_deletions(db: Session) -> None:
+    stuck = create_deleted_user(db, timedelta(hours=2), items=5)
+    recent = create_deleted_user(db, timedelta(minutes=1), items=1)
+    # Disabled by an admin, not deleted
+    disabled = create_random_user(db)
+    disabled.is_active = False
+    db.add(disabled)
+    db.commit()
+    stuck_id, recent_id, disabled_id = stuck.id, recent.id, disabled.id
+    db.expunge_all()
+
+    with patch.object(settings, "CLEANUP_BATCH_SIZE", 2):
+        result = cleanup_expired_data.delay().get()
+
+    assert result["categories"]["deleted_users"]["cleaned"] >= 1
+    assert db.get(User, stuck_id) is None
+    assert count_items(db, stuck_id) == 0
+    assert db.get(User, recent_id) is not None
+    assert count_items(db, recent_id) == 1
+    assert db.get(User, disabled_id) is not None
+
+
+def test_cleanup_skips_locked_items(db: Session) -> None:
+    user = create_deleted_user(db, timedelta(hours=2), items=3)
+    user_id = user.id
+    locked_item = db.exec(select(Item).where(Item.owner_id == user_id)).first()
+    assert locked_item
+    db.expunge_all()
+
+    with engine.connect() as connection, connection.begin():
+        connection.execute(
+            text("SELECT id FROM item WHERE id = :id FOR UPDATE"),
+            {"id": locked_item.id},
+        )
+        result = cleanup_expired_data.delay().get()
+
+    assert result["status"] == "completed"
+    # The locked item and its user are left for the next run
+    assert count_items(db, user_id) == 1
+    assert db.get(User, user_id) is not None
+
+    cleanup_expired_data.delay().get()
+    assert db.get(User, user_id) is None
+
+
+def test_cleanup_stops_when_time_budget_is_spent() -> None:
+    with patch.object(settings, "CLEANUP_TIME_BUDGET_SECONDS", 0):
+        result = cleanup_expired_data.delay().get()
+    assert result == {"status": "partial", "cleaned_count": 0, "categories": {}}
+
+
+def test_health_check_task() -> None:
+    result = health_check_task.delay().get()
+    assert result["dependencies"]["postgres"]["status"] == "ok"
+    assert result["dependencies"]["broker"]["status"] == "ok"
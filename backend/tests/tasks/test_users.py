@@ -0,0 +1,49 @@
+import uuid
+from unittest.mock import patch
+
+from sqlmodel import Session, func, select
+
+from app import crud
+from app.core.config import settings
+from app.models import Item, ItemCreate, User
+from app.tasks.users import delete_user_task
+from tests.utils.user import create_random_user
+
+
+def test_delete_user_task_deletes_items_in_batches(db: Session) -> None:
+    user = create_random_user(db)
+    user_id = user.id
+    for i in range(5):
+        crud.create_item(
+            session=db, item_in=ItemCreate(title=f"item {i}"), owner_id=user.id
+        )
+
+    with (
+        patch.object(settings, "USER_DELETE_BATCH_SIZE", 2),
+        patch.object(delete_user_task, "update_state") as update_state,
+    ):
+        result = delete_user_task.delay(str(user.id)).get()
+
+    assert result == {
+        "status": "deleted",
+        "user_id": str(user.id),
+        "deleted_items": 5,
+    }
+    # One progress update per batch of 2, 2 and 1 items
+    assert [c.kwargs["meta"]["deleted_items"] for c in update_state.call_args_list] == [
+        2,
+        4,
+        5,
+    ]
+    db.expunge(user)
+    assert db.get(User, user_id) is None
+    count = db.exec(
+        select(func.count()).select_from(Item).where(Item.owner_id == user_id)
+    ).one()
+    assert count == 0
+
+
+def test_delete_user_task_user_not_found() -> None:
+    user_id = str(uuid.uuid4())
+    result = delete_user_task.delay(user_id).get()
+    assert result == {"status": "not_found", "user_id": user_id}